@@ -1,12 +1,12 @@
-import pygame
 from pygame.sprite import Sprite
+from assetmanager import AssetManager
 
 
 class Alien(Sprite):
     """A class to represent a single alien in the fleet."""
 
     def __init__(self, ai_game, images, score, offset=0):
-        """Initialize the alien and set its starting position."""
+        """Initialize the alien; its position comes from the fleet it joins."""
         super().__init__()
         self.screen = ai_game.screen
         self.settings = ai_game.settings
@@ -14,29 +14,32 @@ class Alien(Sprite):
         # Load the alien image and set its rect attribute.
         self.images = images
         self.imageindex = offset
-        self.image = pygame.image.load(self.images[self.imageindex])
-        self.rect = self.image.get_rect()
+        self.image = AssetManager.getinstance().getimage(self.images[self.imageindex])
+        self.cellrect = self.image.get_rect()
 
-        # Start each new alien near the top left of the screen.
-        self.rect.x = self.rect.width
-        self.rect.y = self.rect.height
-
-        # Store the alien's exact horizontal position.
-        self.x = float(self.rect.x)
+        # Set by Fleet.add()
+        self.fleet = None
+        self.column = 0
+        self.row = 0
+        self.rectversion = -1
 
         # Store the alien's score value
         self.score = score
 
-    def check_edges(self):
-        """Return True if alien is at edge of screen."""
-        screen_rect = self.screen.get_rect()
-        if self.rect.right >= screen_rect.right or self.rect.left <= 0:
-            return True
-
-    def update(self):
-        """Move the alien right or left."""
-        self.x += (self.settings.alien_speed * self.settings.fleet_direction)
-        self.rect.x = self.x
+    @property
+    def rect(self):
+        """The alien's rect, derived from the fleet's position when first asked for each move."""
+        if self.fleet is None:
+            return self.cellrect
+        return self.fleet.memberrect(self)
+
+    def blitme(self, alpha=1.0):
+        """Draw the alien between its last two positions."""
+        rect = self.rect
+        if self.fleet is not None:
+            return self.screen.blit(self.image, (self.fleet.memberx(self, alpha), rect.y))
+        else:
+            return self.screen.blit(self.image, rect)
 
     def nextframe(self):
         self.imageindex += 1
@@ -44,4 +47,4 @@ class Alien(Sprite):
         if self.imageindex > len(self.images) - 1:
             self.imageindex = 0
 
-        self.image = pygame.image.load(self.images[self.imageindex])
+        self.image = AssetManager.getinstance().getimage(self.images[self.imageindex])
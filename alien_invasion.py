@@ -1,11 +1,14 @@
+from time import perf_counter
+_import_started = perf_counter()
+import os
 import sys
+import atexit
 import random
-from time import sleep
-import threading
+import hashlib
+import argparse
 import pygame
 import pygame.font
 from alien import Alien
-from bullet import Bullet
 from button import Button
 from game_stats import GameStats
 from scoreboard import Scoreboard
@@ -14,173 +17,498 @@ from ship import Ship
 from bunker import Bunker
 from soundmanager import SoundManager
 from alienexplosion import AlienExplosion
-from alienbullet import AlienBullet
+from projectiles import ProjectileManager
 from ufo import UFO
+from fleet import Fleet
+from renderer import Renderer
+from textcache import TextCache
+from scheduler import Scheduler
+from frameprofiler import FrameProfiler
+from assetmanager import AssetManager
+# asyncio, frame capture and recording are imported where they are used, as most runs never need them
+_import_seconds = perf_counter() - _import_started
 
 
 class AlienInvasion:
     """Overall class to manage game assets and behavior."""
 
-    def __init__(self):
-        """Initialize the game, and create game resources."""
-        pygame.init()
-        self.settings = Settings()
+    def __init__(self, headless=False, resolution=None, profile=None, seed=None, record=None, capture=None):
+        """
+        Initialize the game, and create game resources.
+
+        A headless game never opens a window or an audio device: it draws (if at all)
+          to an off-screen surface of a fixed logical resolution, defaulting to the
+          screen size in Settings. A window shows the display's native resolution, unless
+          Settings.logical_resolution fixes the size the game is played and drawn at.
+          'profile' turns the frame profiler on or off,
+          overriding Settings.profile.
+
+        Every random choice in the simulation comes from self.rng, which is reseeded
+          at the start of each game with a seed drawn from 'seed' (or from the system
+          if None). 'record' is a file path to record each game to, for replay().
+          'capture' is a FrameCapture path to record the presented frames to.
+
+        Only what the main menu needs is loaded here; the music is decoded in the
+          background. self.startup holds the seconds each part of start-up took, see
+          startupreport().
+        """
+        self.startup = {'import': _import_seconds}
+        self._startup_clock = perf_counter()
+        self.headless = headless
+        self.rng = random.Random(seed)
+        self.seed = None
+        if self.headless:
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+            os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
 
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        self.settings = Settings()
+        if self.headless:
+            # Only what drawing needs; the mixer stays closed, so no audio device is opened
+            pygame.display.init()
+            pygame.font.init()
+        else:
+            # pygame.init() opens the mixer, and a later mixer.init() can't change it
+            pygame.mixer.pre_init(self.settings.mixer_frequency, buffer=self.settings.mixer_buffer)
+            pygame.init()
+        AssetManager.getinstance().openbundle(self.settings.asset_bundle)
+
+        if self.headless:
+            if resolution is None:
+                resolution = (self.settings.screen_width, self.settings.screen_height)
+            # A hidden 1x1 display on the dummy driver gives images a pixel format to be
+            #   converted to; unconverted images blit an order of magnitude slower.
+            if pygame.display.get_driver() == 'dummy' and pygame.display.get_surface() is None:
+                pygame.display.set_mode((1, 1))
+            display = pygame.display.get_surface()
+            self.screen = pygame.Surface(resolution) if display is None else pygame.Surface(resolution, 0, display)
+        elif self.settings.logical_resolution is None:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            pygame.display.set_caption("Alien Invasion")
+        elif self.settings.scale_mode == 'scaled':
+            # SDL scales the logical screen to the display as it presents it
+            self.screen = pygame.display.set_mode(self.settings.logical_resolution,
+                                                  pygame.FULLSCREEN | pygame.SCALED)
+            pygame.display.set_caption("Alien Invasion")
+        else:
+            # Draw off-screen at the logical size; the renderer smoothscales each frame to the display
+            display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            pygame.display.set_caption("Alien Invasion")
+            self.screen = pygame.Surface(self.settings.logical_resolution, 0, display)
         self.settings.screen_width = self.screen.get_rect().width
         self.settings.screen_height = self.screen.get_rect().height
-        pygame.display.set_caption("Alien Invasion")
+        self._startup_phase('display')
 
         # Create an instance to store game statistics,
         #   and create a scoreboard.
         self.stats = GameStats(self, self.settings)
+        self._startup_phase('scores')
         self.sb = Scoreboard(self)
 
         # Sprites
         self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
+        # Both kinds of bullet are fired, moved and culled by the projectile manager
+        self.projectiles = ProjectileManager(self)
+        self.bullets = self.projectiles.bullets
+        # The fleet and the bunker wall are built by _start_game, so the menu doesn't wait for them
         self.aliens = pygame.sprite.Group()
+        self.fleet = None
         self.explosions = pygame.sprite.Group()
         self.bunkers = pygame.sprite.Group()
-        self.alienbullets = pygame.sprite.Group()
+        self.bunker_top = None
+        self.alienbullets = self.projectiles.alienbullets
         # UFO variables
         self.ufo = None
         self.display_ufo_score = False
         self.ufo_score = None
         self.ufo_rect = None
-
-        self._create_fleet()
-        self._create_bunker_wall()
-
-        self._soundmananger = SoundManager()
-
-        # TODO: Use wait function to display ufo value on screen
+        self._ufo_score_timer = None
+
+        # While the ship explodes, the simulation is frozen apart from the explosion's own timeline
+        self.ship_exploding = False
+        # Shots wait for the next tick, so they land on the same tick in a replay
+        self._fire_requested = False
+        self.recorder = None
+        if record:
+            from recording import Recorder
+            self.recorder = Recorder(self, record)
+
+        # Main loop state
+        self._accumulator = 0.0
+        self.showing_scores = False
+        self.running = False
+        self._tasks = set()
+
+        self.renderer = Renderer(self)
+        if not self.headless and self.screen is not pygame.display.get_surface():
+            self.renderer.setoutput(pygame.display.get_surface())
+        if capture:
+            from framecapture import FrameCapture
+            self.renderer.capture = FrameCapture(self, capture)
+            self.renderer.capture.start()
+            atexit.register(self.renderer.capture.close)
+
+        # Per-phase frame timing; costs nothing unless enabled
+        self.profiler = FrameProfiler(self)
+        if profile or (profile is None and self.settings.profile):
+            self.profiler.enable()
+        self._startup_phase('assets')
+
+        self._soundmananger = SoundManager.getinstance(muted=self.headless, settings=self.settings)
+        self._startup_phase('audio')
 
         """
-        DEFINITION OF EVENTS:
-        a) '_update_frame_event': EVENTID=25, how often alien animations should be updated
-        b) '_update_explosion_frame_event': EVENTID=26, how often explosion animations should be updated
-        c) '_alien_shoot_event': EVENTID=27, how often the aliens have an opportunity to shoot
-        d) '_ufo_summon_event': EVENTID=28, how often the ufo has an opportunity to spawn
+        DEFINITION OF TIMERS (in simulation seconds, driven by _step):
+        a) '_update_frame_timer': how often alien animations should be updated
+        b) '_update_explosion_frame_timer': how often explosion animations should be updated
+        c) '_alien_shoot_timer': how often the aliens have an opportunity to shoot
+        d) '_ufo_summon_timer': how often the ufo has an opportunity to spawn
+        The ship's explosion plays on a scheduler of its own, which is the only one that
+          advances while the ship is exploding, so none of the above fire then.
         """
-        self._update_frame_event = pygame.USEREVENT + 1
-        self._update_explosion_frame_event = pygame.USEREVENT + 2
-        self._alien_shoot_event = pygame.USEREVENT + 3
-        self._ufo_summon_event = pygame.USEREVENT + 4
-        pygame.time.set_timer(self._update_frame_event, 1000)
-        pygame.time.set_timer(self._update_explosion_frame_event, 200)
-        pygame.time.set_timer(self._alien_shoot_event, self.settings.current_fire_interval)
-        pygame.time.set_timer(self._ufo_summon_event, 10000)
+        self.scheduler = Scheduler()
+        self.explosion_scheduler = Scheduler()
+        self._alien_shoot_timer = None
+        self._reset_timers()
 
         # Make the Play button.
         self.play_button = Button(self, "Play", (0, -50))
         self.score_button = Button(self, "High Scores", (0, 50))
         self.back_button = Button(self, "Main Menu", (0, 50))
 
+        # Menu and high score screens, rendered once and redrawn with a single blit.
+        # Each is rebuilt only when its key (resolution, and the high scores) changes.
+        self.menu_image = None
+        self.menu_key = None
+        self.scores_image = None
+        self.scores_key = None
+        self._startup_phase('assets')
+        # Print startupreport() once the first frame is shown
+        self.report_startup = False
+
+    def _startup_phase(self, name):
+        """Add the time since the previous phase ended to 'name' in self.startup."""
+        now = perf_counter()
+        self.startup[name] = self.startup.get(name, 0.0) + now - self._startup_clock
+        self._startup_clock = now
+
+    def startupreport(self):
+        """Return the start-up times as text, one part per line, in milliseconds."""
+        lines = ["{:<12}{:8.1f} ms".format(name, seconds * 1000) for name, seconds in self.startup.items()]
+        lines.append("{:<12}{:8.1f} ms".format('total', sum(self.startup.values()) * 1000))
+        if not self.headless:
+            music = self._soundmananger.getstats()['music_load_seconds']
+            lines.append("music       {} (in the background)".format(
+                "loading" if music is None else "{:8.1f} ms".format(music * 1000)))
+        return "\n".join(lines)
+
     def run_game(self):
         """Start the main loop for the game."""
-        # Game stats == false is here
+        clock = pygame.time.Clock()
+
         while True:
-            self._check_events()
+            # Sleeps (rather than spins) to hold the frame cap
+            frame_time = clock.tick(self.settings.frame_cap) / 1000
+            self._run_frame(frame_time)
+
+    async def run_async(self):
+        """
+        Run the main loop as a coroutine, yielding to the asyncio event loop once per frame.
+
+        Use this to embed the game in an asyncio application:
+
+            async def main():
+                ai = AlienInvasion()
+                ai.spawn(serve_control_socket(ai))    # any coroutine, runs between frames
+                await ai.run_async()
+
+            asyncio.run(main())
+
+        Each frame runs to completion, then the frame pacer sleeps on the event loop for
+          the rest of the frame budget (Settings.frame_cap), which is when other tasks run.
+          Tasks should therefore do their work in short steps between awaits; blocking calls
+          belong in loop.run_in_executor(). Closing the window, pressing Q/Escape or calling
+          stop() makes run_async return (rather than exiting the process), after
+          cancelling the tasks started with spawn().
+        """
+        import asyncio
+        from framepacer import FramePacer
+
+        pacer = FramePacer(self.settings.frame_cap)
+        self.running = True
+
+        try:
+            while self.running:
+                frame_time = await pacer.tick()
+                try:
+                    self._run_frame(frame_time)
+                except SystemExit:
+                    break
+        finally:
+            self.running = False
+            for task in list(self._tasks):
+                task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def spawn(self, coroutine):
+        """Start a coroutine as a background task on the running loop; it is cancelled when run_async ends."""
+        import asyncio
+
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def stop(self):
+        """Make run_async return after the current frame."""
+        self.running = False
+
+    def _run_frame(self, frame_time):
+        """Handle events, advance the simulation by frame_time seconds and draw one frame."""
+        self._check_events()
+        self._soundmananger.update()
+
+        if self.stats.game_active:
+            # Advance the simulation in fixed steps, then draw between the last two states
+            step = 1 / self.settings.tick_rate
+            self._accumulator += min(frame_time, self.settings.max_frame_time)
+            while self._accumulator >= step and self.stats.game_active:
+                self._step(step)
+                self._accumulator -= step
+            # Nothing moves while the ship explodes, so there is nothing to interpolate
+            self._update_screen(1.0 if self.ship_exploding else self._accumulator / step)
+        elif self.stats.entering_initials:
+            self._accumulator = 0.0
+            self._draw_initials_screen()
+        elif self.showing_scores:
+            self._accumulator = 0.0
+            self._draw_scores_screen()
+        else:
+            self._accumulator = 0.0
+            self._draw_main_menu()
+
+        if 'first frame' not in self.startup:
+            self._startup_phase('first frame')
+            if self.report_startup:
+                print(self.startupreport(), file=sys.stderr)
+
+    def _step(self, dt):
+        """Advance the game simulation by one fixed tick of dt seconds."""
+        fire, self._fire_requested = self._fire_requested, False
+        if self.recorder is not None:
+            self.recorder.record(self.ship.moving_left, self.ship.moving_right, fire)
+
+        if self.ship_exploding:
+            self.explosion_scheduler.advance(dt)
+        else:
+            self.scheduler.advance(dt)
+            if fire:
+                self._fire_bullet()
+            self.ship.update(dt)
+            self._update_bullets(dt)
+            self._update_aliens(dt)
+
+        # A recording ends with the tick that ended its game
+        if self.recorder is not None and not self.stats.game_active:
+            self.recorder.finish()
+
+    def simulate(self, frames, render=False, autopilot=True):
+        """
+        Run the game logic for a number of fixed ticks as fast as possible and return a report.
+
+        Intended for headless games: a fresh game is started (and restarted on game over),
+          and the autopilot sweeps the ship across the screen while firing constantly.
+        """
+        if not self.stats.game_active:
+            self._start_game()
+
+        self.ship.moving_right = autopilot
+        step = 1 / self.settings.tick_rate
+        start = perf_counter()
+
+        for frame in range(frames):
+            self._simulate_frame(step, render, autopilot)
 
-            if self.stats.game_active:
-                self.ship.update()
-                self._update_bullets()
-                self._update_aliens()
+        seconds = perf_counter() - start
+
+        return {
+            'frames': frames,
+            'seconds': seconds,
+            'fps': frames / seconds if seconds else 0.0,
+            'score': self.stats.score,
+            'level': self.stats.level,
+            'ships_left': self.stats.ships_left,
+            'projectiles': self.projectiles.stats(),
+        }
+
+    def replay(self, recording, render=False):
+        """
+        Play back a Recording as fast as possible and return a report.
+
+        The game is restarted with the recording's seed and fed its input tick by tick;
+          'matches' in the report tells whether the final state is identical to the
+          recorded game's.
+        """
+        if recording.tick_rate != self.settings.tick_rate or recording.resolution != self.screen.get_size():
+            raise ValueError("the recording needs a {}x{} screen at {} ticks per second".format(
+                recording.resolution[0], recording.resolution[1], recording.tick_rate))
+
+        self._start_game(recording.seed)
+        step = 1 / self.settings.tick_rate
+        start = perf_counter()
+
+        for left, right, fire in recording.ticks():
+            self.ship.moving_left = left
+            self.ship.moving_right = right
+            self._fire_requested = fire
+            self._step(step)
+            if render:
                 self._update_screen()
-            else:
-                self._draw_main_menu()
+
+        seconds = perf_counter() - start
+        digest = self.state_digest()
+        ticks = len(recording.inputs)
+
+        return {
+            'ticks': ticks,
+            'seconds': seconds,
+            'tps': ticks / seconds if seconds else 0.0,
+            'score': self.stats.score,
+            'level': self.stats.level,
+            'ships_left': self.stats.ships_left,
+            'digest': digest.hex(),
+            'matches': digest == recording.digest,
+        }
+
+    def state_digest(self):
+        """Return a hash of everything the simulation's future depends on."""
+        state = hashlib.sha256()
+        state.update(repr((
+            self.stats.score, self.stats.level, self.stats.ships_left, self.stats.game_active,
+            self.scheduler.time, self.explosion_scheduler.time, self.rng.getstate(), self.ship.x, self.ship_exploding,
+            self.fleet.origin_x, self.fleet.origin_y, self.settings.fleet_direction,
+            [(alien.column, alien.row) for alien in self.aliens],
+            [bullet.y for bullet in self.bullets], [(bullet.rect.x, bullet.y) for bullet in self.alienbullets],
+            None if self.ufo is None else (self.ufo.x, self.ufo.rect.y, self.ufo.score),
+        )).encode())
+        for bunker in self.bunkers:
+            state.update(pygame.image.tobytes(bunker.image, 'RGBA'))
+        return state.digest()
+
+    def _simulate_frame(self, step, render, autopilot):
+        """Run one simulated frame of a headless game: a single tick, optionally drawn."""
+        self._check_events()
+
+        if autopilot:
+            if self.ship.rect.right >= self.settings.screen_width:
+                self.ship.moving_right, self.ship.moving_left = False, True
+            elif self.ship.rect.left <= 0 or not (self.ship.moving_left or self.ship.moving_right):
+                self.ship.moving_right, self.ship.moving_left = True, False
+            self._fire_requested = True
+
+        self._step(step)
+        if render:
+            self._update_screen()
+
+        if not self.stats.game_active:
+            self._start_game()
 
     def _check_events(self):
         """Respond to keypresses and mouse events."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 sys.exit()
+            elif event.type == pygame.KEYDOWN and self.stats.entering_initials:
+                self._check_initials_event(event)
             elif event.type == pygame.KEYDOWN:
                 self._check_keydown_events(event)
             elif event.type == pygame.KEYUP:
                 self._check_keyup_events(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                self._check_play_button(mouse_pos)
-                self._check_score_button(mouse_pos)
-            elif event.type == self._update_frame_event:
-                self._update_frames()
-            elif event.type == self._update_explosion_frame_event:
-                self._update_explosion_frames()
-            elif event.type == self._alien_shoot_event:
-                self._alien_shoot()
-            elif event.type == self._ufo_summon_event:
-                self._create_ufo()
+            elif event.type == pygame.MOUSEBUTTONDOWN and not self.stats.entering_initials:
+                mouse_pos = self.renderer.tological(pygame.mouse.get_pos())
+                if self.showing_scores:
+                    self._check_back_button(mouse_pos)
+                else:
+                    self._check_play_button(mouse_pos)
+                    self._check_score_button(mouse_pos)
 
     # Game start function
     def _check_play_button(self, mouse_pos):
         """Start a new game when the player clicks Play."""
         button_clicked = self.play_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.stats.game_active:
-            # Reset the game settings.
-            self.settings.initialize_dynamic_settings()
-
-            # Make sure all sprites are destroyed if there was a previous game
-            self.bullets.empty()
-            self.bunkers.empty()
-            self.alienbullets.empty()
-            self.aliens.empty()
-            if self.ufo is not None:
-                self.ufo.kill()
-                if self._soundmananger.getinstance().getufosoundactive:
-                    self._soundmananger.getinstance().stopufosound()
-                self.ufo = None
-
-            # Reset the game statistics.
-            self.stats.reset_stats(self.settings)
-            self.stats.game_active = True
-            self.sb.prep_score()
-            self.sb.prep_level()
-            self.sb.prep_ships()
-
-            # Get rid of any remaining aliens and bullets.
-            self.aliens.empty()
-            self.bullets.empty()
-            
-            # Create a new fleet and center the ship.
-            self._create_fleet()
-            self._create_bunker_wall()
-            self.ship.center_ship()
+            self._start_game()
+
+    def _start_game(self, seed=None):
+        """Reset all game state and start a new game, seeded with 'seed' or a fresh seed."""
+        self.seed = self.rng.getrandbits(63) if seed is None else seed
+        self.rng.seed(self.seed)
+        if self.recorder is not None:
+            self.recorder.start(self.seed)
+
+        # Reset the game settings.
+        self.settings.initialize_dynamic_settings()
+
+        # Make sure all sprites are destroyed if there was a previous game
+        self.projectiles.clear()
+        self.bunkers.empty()
+        self.aliens.empty()
+        self.explosions.empty()
+        self.ship_exploding = False
+        self._fire_requested = False
+        self.display_ufo_score = False
+        if self.ufo is not None:
+            self.ufo.kill()
+            if self._soundmananger.getinstance().getufosoundactive:
+                self._soundmananger.getinstance().stopufosound()
+            self.ufo = None
+
+        # Reset the game statistics.
+        self.stats.reset_stats(self.settings)
+        self.stats.game_active = True
+        self.sb.prep_score()
+        self.sb.prep_level()
+        self.sb.prep_ships()
+
+        # Get rid of any remaining aliens and bullets.
+        self.aliens.empty()
+        self.bullets.empty()
+        
+        # Create a new fleet and center the ship.
+        self._create_fleet()
+        self._create_bunker_wall()
+        self.ship.center_ship()
+        self.ship.moving_left = self.ship.moving_right = False
+        self.ship.resetimage()
 
-            # Update events
-            pygame.time.set_timer(self._alien_shoot_event, self.settings.current_fire_interval)
+        # Restart every timer from zero
+        self._reset_timers()
 
-            # Hide the mouse cursor.
+        # Hide the mouse cursor.
+        if not self.headless:
             pygame.mouse.set_visible(False)
 
-            # Start background music
-            self._soundmananger.getinstance().startgame()
+        # Start background music
+        self._soundmananger.getinstance().startgame()
 
     def _check_score_button(self, mouse_pos):
         button_clicked = self.score_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.stats.game_active:
-            self.screen.fill(self.settings.bg_color)
-            self.screen.blit(self.settings.screenbackground, self.settings.screenbackgroundrect)
-            self.stats.display_scores()
-            self.back_button.rect = self.score_button.rect
-            self.back_button.prep_msg()
-            self.back_button.draw_button()
-            pygame.display.flip()
-
-            while True:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        sys.exit()
-                    elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_q or event.key == pygame.K_ESCAPE:
-                            pygame.quit()
-                            sys.exit()
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        mouse_pos = pygame.mouse.get_pos()
-                        button_clicked = self.score_button.rect.collidepoint(mouse_pos)
-                        if button_clicked:
-                            return
+            # The main loop shows the high scores until the back button is clicked
+            self.showing_scores = True
+
+    def _check_back_button(self, mouse_pos):
+        """Return to the main menu when the player clicks Main Menu on the high scores."""
+        # The back button sits where the score button is
+        if self.score_button.rect.collidepoint(mouse_pos):
+            self.showing_scores = False
+
+    def _check_initials_event(self, event):
+        """Take a letter of the player's initials; every other key is ignored until all three are in."""
+        character = pygame.key.name(event.key)
+        if len(character) == 1 and character.isalpha() and self.stats.addinitial(character):
+            # Show where the new score landed
+            self.showing_scores = True
 
     def _check_keydown_events(self, event):
         """Respond to keypresses."""
@@ -191,7 +519,11 @@ class AlienInvasion:
         elif event.key == pygame.K_q or event.key == pygame.K_ESCAPE:
             sys.exit()
         elif event.key == pygame.K_SPACE:
-            self._fire_bullet()
+            self._fire_requested = True
+        elif event.key == pygame.K_F3:
+            self.profiler.toggle()
+        elif event.key == pygame.K_F12 and self.renderer.capture is not None:
+            self.renderer.capture.toggle()
 
     def _check_keyup_events(self, event):
         """Respond to key releases."""
@@ -202,34 +534,39 @@ class AlienInvasion:
 
     def _fire_bullet(self):
         """Create a new bullet and add it to the bullets group."""
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
+        if self.ship_exploding:
+            return
+
+        if self.projectiles.fire() is not None:
+            self._soundmananger.getinstance().playsound('shoot')
 
     def _alien_shoot(self):
-        for alien in self.aliens:
-            if random.randint(0, self.settings.current_fire_chance) == self.settings.fire_chance_key:
-                self._alien_fire_bullet(alien)
+        """
+        Fire from the front of a few random columns.
 
-    def _alien_fire_bullet(self, alien):
-        new_bullet = AlienBullet(self, alien)
-        self.alienbullets.add(new_bullet)
+        Every alien used to roll its own 1 in (current_fire_chance + 1) chance; the same
+          expected number of shots is now drawn once and spread over the front-most alien
+          of randomly chosen columns, so only aliens with a clear line of fire shoot.
+        """
+        front = self.fleet.frontaliens()
+        if not front:
+            return
 
-    def _update_bullets(self):
-        """Update position of bullets and get rid of old bullets."""
-        # Update bullet positions.
-        self.bullets.update()
-        # Update alien bullet positions
-        self.alienbullets.update()
+        expected = len(self.aliens) / (self.settings.current_fire_chance + 1)
+        shots = int(expected)
+        if self.rng.random() < expected - shots:
+            shots += 1
 
-        # Get rid of bullets that have disappeared.
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
+        for alien in self.rng.sample(front, min(shots, len(front))):
+            self._alien_fire_bullet(alien)
 
-        for bullet in self.alienbullets.copy():
-            if bullet.rect.bottom >= self.settings.screen_height:
-                self.bullets.remove(bullet)
+    def _alien_fire_bullet(self, alien):
+        if self.projectiles.firealien(alien) is not None:
+            self._soundmananger.getinstance().playsound('alienshoot')
+
+    def _update_bullets(self, dt):
+        """Update position of bullets and get rid of old bullets."""
+        self.projectiles.update(dt)
 
         self._check_bullet_alien_collisions()
         self._check_alienbullet_collisions()
@@ -244,39 +581,45 @@ class AlienInvasion:
                 self.sb.prep_score()
                 self.sb.check_high_score()
                 score_str = "{:,}".format(self.ufo.score)
-                font = pygame.font.SysFont(None, 36)
-                self.ufo_score = font.render(score_str, True, (255, 255, 0), self.settings.bg_color)
+                self.ufo_score = TextCache.getinstance().render(score_str, 36, (255, 255, 0), self.settings.bg_color)
                 self.ufo_rect = self.ufo_score.get_rect()
                 self.ufo_rect.center = self.ufo.rect.center
                 self.display_ufo_score = True
-                thread = threading.Thread(target=self._ufo_score_duration, args=[3000], daemon=True)
-                thread.start()
+                if self._ufo_score_timer is not None:
+                    self._ufo_score_timer.cancel()
+                self._ufo_score_timer = self.scheduler.schedule(3.0, self._hide_ufo_score)
                 self.ufo.kill()
                 if self._soundmananger.getinstance().getufosoundactive():
                     self._soundmananger.getinstance().stopufosound()
+                self._soundmananger.getinstance().playsound('aliendeath')
                 self.ufo = None
 
         """Respond to bullet-alien collisions."""
         # Remove any bullets and aliens that have collided.
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, True, False)
-
-        if collisions:
-            for aliens in collisions.values():
+        # Each bullet is only tested against the fleet cells it overlaps.
+        collisions = False
+        for bullet in self.bullets.sprites():
+            aliens = self.fleet.collide(bullet.rect)
+            if aliens:
+                collisions = True
+                bullet.kill()
                 for alien in aliens:
                     self.stats.score += alien.score
                     explosion = AlienExplosion(self, alien)
                     self.explosions.add(explosion)
-                    alien.kill()
+                    self.fleet.addexplosion(explosion, alien.column, alien.row)
+                    self.fleet.remove(alien)
+                    self._soundmananger.getinstance().playsound('aliendeath')
 
+        if collisions:
             self.sb.prep_score()
             self.sb.check_high_score()
 
         if not self.aliens:
             # New level created here
             # Destroy existing bullets and create new fleet.
-            self.bullets.empty()
+            self.projectiles.clear()
             self.bunkers.empty()
-            self.alienbullets.empty()
             if self.ufo is not None:
                 self.ufo.kill()
                 if self._soundmananger.getinstance().getufosoundactive:
@@ -288,7 +631,7 @@ class AlienInvasion:
             # Adjust stats & increase level
             self.stats.level += 1
             self.settings.increase_speed(self.stats.level)
-            pygame.time.set_timer(self._alien_shoot_event, self.settings.current_fire_interval)
+            self._reset_alien_shoot_timer()
 
             self._soundmananger.getinstance().newlevel()
 
@@ -319,20 +662,20 @@ class AlienInvasion:
                     if bunker.validhit(bullet, True):
                         bullet.kill()
 
-    def _update_aliens(self):
+    def _update_aliens(self, dt):
         """
         Check if the fleet is at an edge,
           then update the positions of all aliens in the fleet.
         """
         self._check_fleet_edges()
-        self.aliens.update()
-        self.explosions.update()
+        # Aliens and explosions move with the formation; their rects follow when next asked for.
+        self.fleet.shift(self.settings.alien_speed * self.settings.fleet_direction * dt)
 
         if self.ufo is not None:
-            self.ufo.update()
+            self.ufo.update(dt)
 
-        # Look for alien-ship collisions.
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        # Look for alien-ship collisions, once the fleet is low enough to touch the ship.
+        if self.fleet.bottom() >= self.ship.rect.top and pygame.sprite.spritecollideany(self.ship, self.aliens):
             self._ship_hit()
 
         # Look for aliens hitting the bottom of the screen.
@@ -357,54 +700,43 @@ class AlienInvasion:
             explosion.nextframe()
 
             if explosion.finished:
-                explosion.kill()
+                self.fleet.remove(explosion)
 
     def _check_aliens_bottom(self):
         """Check if any aliens have reached the bottom of the screen."""
-        screen_rect = self.screen.get_rect()
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= screen_rect.bottom:
-                # Treat this the same as if the ship got hit.
-                self._ship_hit()
-                break
+        if self.fleet.bottom() >= self.settings.screen_height:
+            # Treat this the same as if the ship got hit.
+            self._ship_hit()
+
+        """Also check for bunker collisions, once the fleet is low enough to reach them"""
+        if not self.bunkers or self.fleet.bottom() < self.bunker_top:
+            return
 
-        """Also check for bunker collisions"""
         collisions = pygame.sprite.groupcollide(self.bunkers, self.aliens, False, False)
 
         if collisions:
             for bunker in collisions:
                 for alien in collisions[bunker]:
-                    alien.kill()
+                    self.fleet.remove(alien)
                     bunker.kill()
                     break
 
-    def _ship_explosion(self):
-        for image in self.ship.explosion_frames:
-            self.ship.setexplosionframe(image)
-            self._update_screen()
-            pygame.time.wait(175)
-
-        self.ship.resetimage()
-        self._update_screen()
-        pygame.time.wait(500)
-
     def _ship_hit(self):
         """Respond to the ship being hit by an alien."""
-        thread = threading.Thread(target=self._ship_explosion, args=(), daemon=True)
-        thread.start()
-
-        # Threading the explosion function to allow exiting of the game
-        # pygame.time.wait() locks the window, preventing exiting
-        while thread.is_alive():
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_q or event.key == pygame.K_ESCAPE:
-                        pygame.quit()
-                        sys.exit()
+        if self.ship_exploding:
+            return
 
+        # Play the explosion as a timeline in simulation time, with the game frozen until it ends
+        self.ship_exploding = True
+        self._soundmananger.getinstance().playsound('shipexplosion')
+        steps = [(0.0 if index == 0 else 0.175, lambda image=image: self.ship.setexplosionframe(image))
+                 for index, image in enumerate(self.ship.explosion_frames)]
+        steps.append((0.175, self.ship.resetimage))
+        steps.append((0.5, self._ship_hit_aftermath))
+        self.explosion_scheduler.timeline(steps)
+
+    def _ship_hit_aftermath(self):
+        """Once the explosion has played, lose a ship or end the game."""
         if self.stats.ships_left > 0:
             # Decrement ships_left, and update scoreboard.
             self.stats.ships_left -= 1
@@ -412,9 +744,8 @@ class AlienInvasion:
             
             # Get rid of any remaining aliens, bunkers, and all bullets
             self.aliens.empty()
-            self.bullets.empty()
+            self.projectiles.clear()
             self.bunkers.empty()
-            self.alienbullets.empty()
             if self.ufo is not None:
                 self.ufo.kill()
                 if self._soundmananger.getinstance().getufosoundactive:
@@ -428,23 +759,30 @@ class AlienInvasion:
             self._soundmananger.getinstance().newlevel()
             
             # Pause.
-            sleep(0.5)
+            self.explosion_scheduler.schedule(0.5, self._end_ship_explosion)
         # Game ending control goes here
         else:
+            self.ship_exploding = False
             self.stats.game_active = False
             if self._soundmananger.getinstance().getmusicplaying():
                 self._soundmananger.getinstance().stopmusic()
+
+            if self.headless:
+                return
+
             pygame.mouse.set_visible(True)
 
-            if self.stats.checkfornewhighscore():
-                self._check_score_button(self.score_button.rect.center)
+            # A score that makes the table is entered from the main loop, then the table is shown
+            self.stats.checkfornewhighscore()
+
+    def _end_ship_explosion(self):
+        self.ship_exploding = False
 
     def _create_fleet(self):
         """Create the fleet of aliens."""
-        # Create an alien and find the number of aliens in a row.
+        # Find the number of aliens in a row.
         # Spacing between each alien is equal to one alien width.
-        alien = Alien(self, ['images/alien1frame1.png', 'images/alien1frame2.png'], 0)
-        alien_width, alien_height = alien.rect.size
+        alien_width, alien_height = AssetManager.getinstance().getimage('images/alien1frame1.png').get_size()
         available_space_x = self.settings.screen_width - (2 * alien_width)
         number_aliens_x = available_space_x // (2 * alien_width)
         
@@ -455,6 +793,10 @@ class AlienInvasion:
         # number_rows = available_space_y // (2 * alien_height)
         number_rows = self.settings.number_of_rows
 
+        # Aliens sit on a lattice two alien widths apart, with rows 1.25 alien heights apart.
+        self.fleet = Fleet(number_aliens_x, number_rows, alien_width, alien_height,
+                           2 * alien_width, 1.25 * alien_height, alien_width, alien_height)
+
         alienimages = [
             ['images/alien1frame1.png', 'images/alien1frame2.png'],
             ['images/alien2frame1.png', 'images/alien2frame2.png'],
@@ -476,33 +818,49 @@ class AlienInvasion:
     def _create_alien(self, alien_number, row_number, images, score, offset):
         """Create an alien and place it in the row."""
         alien = Alien(self, images, score, offset)
-        alien_width, alien_height = alien.rect.size
-        alien.x = alien_width + 2 * alien_width * alien_number
-        alien.rect.x = alien.x
-        alien.rect.y = alien.rect.height + 1.25 * alien.rect.height * row_number
         self.aliens.add(alien)
+        self.fleet.add(alien, alien_number, row_number)
 
     def _create_ufo(self):
         if not self.stats.game_active:
             return
 
-        if self.ufo is None and random.randint(0, 5) == 2:
-            self.ufo = UFO(self, int(self.settings.score_values[2] * random.randint(3, 9) / 1.5))
-            self.ufo.rect.y = int(self.settings.screen_height * random.randint(15, 75) / 100)
+        if self.ufo is None and self.rng.randint(0, 5) == 2:
+            self.ufo = UFO(self, int(self.settings.score_values[2] * self.rng.randint(3, 9) / 1.5))
+            self.ufo.rect.y = int(self.settings.screen_height * self.rng.randint(15, 75) / 100)
             if not self._soundmananger.getinstance().getufosoundactive():
                 self._soundmananger.getinstance().playufosound()
 
-    def _ufo_score_duration(self, duration):
-        pygame.time.wait(duration)
+    def _hide_ufo_score(self):
         self.display_ufo_score = False
+        self._ufo_score_timer = None
+
+    def _reset_timers(self):
+        """Drop every scheduled event and start the game's timers again from time zero."""
+        self.scheduler.clear()
+        self.scheduler.time = 0.0
+        self.explosion_scheduler.clear()
+        self.explosion_scheduler.time = 0.0
+        self._ufo_score_timer = None
+        self._update_frame_timer = self.scheduler.every(1.0, self._update_frames)
+        self._update_explosion_frame_timer = self.scheduler.every(0.2, self._update_explosion_frames)
+        self._reset_alien_shoot_timer()
+        self._ufo_summon_timer = self.scheduler.every(10.0, self._create_ufo)
+
+    def _reset_alien_shoot_timer(self):
+        """Restart the alien shooting timer at the current fire interval."""
+        if self._alien_shoot_timer is not None:
+            self._alien_shoot_timer.cancel()
+        self._alien_shoot_timer = self.scheduler.every(self.settings.current_fire_interval / 1000,
+                                                       self._alien_shoot)
 
     def _create_bunker_wall(self):
         """Create the row of bunkers."""
-        # Create an bunker and find the number of bunkers in a row.
-        # Spacing between each bunker is equal to one alien width.
-        bunker = Bunker(self)
-        bunker_width, bunker_height = bunker.rect.size
+        # Find the number of bunkers in a row from the bunker image's size.
+        # Spacing between each bunker is equal to one bunker width.
+        bunker_width, bunker_height = AssetManager.getinstance().getimage('images/bunker.png').get_size()
         available_space_x = self.settings.screen_width
+        self.bunker_top = int(self.settings.screen_height * 0.80)
         number_bunkers_x = (available_space_x // bunker_width) // 2
 
         # Create the full wall of bunkers.
@@ -515,20 +873,14 @@ class AlienInvasion:
         bunker_width, bunker_height = bunker.rect.size
         bunker.x = (bunker_width // 2) + 2 * bunker_width * bunker_number
         bunker.rect.x = bunker.x
-        bunker.rect.y = int(self.settings.screen_height * 0.80)
+        bunker.rect.y = self.bunker_top
         self.bunkers.add(bunker)
 
     def _check_fleet_edges(self):
         """Respond appropriately if any aliens have reached an edge."""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                return
-
-        for explosion in self.explosions.sprites():
-            if explosion.check_edges():
-                self._change_fleet_direction()
-                return
+        if self.fleet.check_edges(self.settings.screen_width):
+            self._change_fleet_direction()
+            return
 
         if self.ufo is not None:
             if self.ufo.check_edges():
@@ -540,52 +892,137 @@ class AlienInvasion:
     def _change_fleet_direction(self):
         """Drop the entire fleet and change the fleet's direction."""
         # They do drop down
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
+        self.fleet.drop(self.settings.fleet_drop_speed)
         self.settings.fleet_direction *= -1
 
+    def _prep_main_menu(self):
+        """Return the main menu and its buttons rendered into one surface, rebuilding it if stale."""
+        key = self.screen.get_size()
+        if self.menu_image is None or self.menu_key != key:
+            self.menu_image = self.renderer.getbackdrop().copy()
+            height = self.sb.show_main_menu(self.menu_image)
+            self.play_button.rect.bottom = self.play_button.rect.height + height + 75
+            self.score_button.rect.top = self.play_button.rect.bottom + 50
+            self.play_button.prep_msg()
+            self.score_button.prep_msg()
+            self.play_button.draw_button(self.menu_image)
+            self.score_button.draw_button(self.menu_image)
+            self.menu_key = key
+
+        return self.menu_image
+
+    def _prep_scores_screen(self):
+        """Return the high score table and back button rendered into one surface, rebuilding it if stale."""
+        key = (self.screen.get_size(), tuple(self.stats.highscorelist))
+        if self.scores_image is None or self.scores_key != key:
+            self.scores_image = self.renderer.getbackdrop().copy()
+            self.stats.display_scores(self.scores_image)
+            self.back_button.rect = self.score_button.rect
+            self.back_button.prep_msg()
+            self.back_button.draw_button(self.scores_image)
+            self.scores_key = key
+
+        return self.scores_image
+
+    def _draw_scores_screen(self):
+        self.renderer.invalidate()
+        self.screen.blit(self._prep_scores_screen(), (0, 0))
+        self.renderer.present(static=('scores', self.scores_key))
+
+    def _draw_initials_screen(self):
+        self.renderer.invalidate()
+        self.screen.blit(self.renderer.getbackdrop(), (0, 0))
+        self.stats.draw_initials_prompt(self.screen)
+        self.renderer.present(static=('initials', self.stats.score, self.stats.initials))
+
     def _draw_main_menu(self):
-        self.screen.fill(self.settings.bg_color)
-        self.screen.blit(self.settings.screenbackground, self.settings.screenbackgroundrect)
-        height = self.sb.show_main_menu()
-        self.play_button.rect.bottom = self.play_button.rect.height + height + 75
-        self.score_button.rect.top = self.play_button.rect.bottom + 50
-        self.play_button.prep_msg()
-        self.score_button.prep_msg()
-        self.play_button.draw_button()
-        self.score_button.draw_button()
-        pygame.display.flip()
-
-    def _update_screen(self):
-        """Update images on the screen, and flip to the new screen."""
-        self.screen.fill(self.settings.bg_color)
-        self.screen.blit(self.settings.screenbackground, self.settings.screenbackgroundrect)
-        self.ship.blitme()
+        # The menu draws over the whole screen, so it is presented whole (as is the next game frame)
+        self.renderer.invalidate()
+        self.screen.blit(self._prep_main_menu(), (0, 0))
+        self.renderer.present(static=('menu', self.menu_key))
+
+    def _update_screen(self, alpha=1.0):
+        """
+        Update images on the screen, and flip to the new screen.
+
+        Moving sprites are drawn 'alpha' of the way from their previous to their current tick.
+          Every drawn rect is handed to the renderer, which decides how much to present.
+        """
+        renderer = self.renderer
+        renderer.begin_frame()
+        renderer.add(self.ship.blitme(alpha))
         if self.ufo is not None:
-            self.ufo.blitme()
+            renderer.add(self.ufo.blitme(alpha))
         for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
+            renderer.add(bullet.draw_bullet(alpha))
 
         for bullet in self.alienbullets.sprites():
-            bullet.draw_bullet()
+            renderer.add(bullet.draw_bullet(alpha))
 
         # Draw the aliens
-        self.aliens.draw(self.screen)
+        for alien in self.aliens.sprites():
+            renderer.add(alien.blitme(alpha))
         # Draw the bunkers
-        self.bunkers.draw(self.screen)
+        renderer.extend(self.screen.blits([(bunker.image, bunker.rect) for bunker in self.bunkers.sprites()]))
         # Draw the explosions
-        self.explosions.draw(self.screen)
+        for explosion in self.explosions.sprites():
+            renderer.add(explosion.blitme(alpha))
 
         # Draw the score information.
-        self.sb.show_score()
+        renderer.extend(self.sb.show_score())
 
         if self.display_ufo_score:
-            self.screen.blit(self.ufo_score, self.ufo_rect)
+            renderer.add(self.screen.blit(self.ufo_score, self.ufo_rect))
 
-        pygame.display.flip()
+        renderer.present()
 
 
 if __name__ == '__main__':
-    # Make a game instance, and run the game.
-    ai = AlienInvasion()
-    ai.run_game()
+    parser = argparse.ArgumentParser(description="Alien Invasion")
+    parser.add_argument('--headless', action='store_true',
+                        help="run the game logic without a window or audio and report simulated fps")
+    parser.add_argument('--frames', type=int, default=10000, help="frames to simulate in headless mode")
+    parser.add_argument('--width', type=int, default=None, help="headless logical screen width")
+    parser.add_argument('--height', type=int, default=None, help="headless logical screen height")
+    parser.add_argument('--render', action='store_true', help="also draw each frame in headless mode")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each phase of every frame (F3 toggles), writing the samples to CSV on exit")
+    parser.add_argument('--seed', type=int, default=None, help="seed the random choices of every game")
+    parser.add_argument('--record', metavar='PATH', help="record the most recent game's seed and input to a file")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="replay a recorded game headlessly at full speed and check its final state")
+    parser.add_argument('--capture', metavar='PATH',
+                        help="record presented frames (a directory for PNGs, else a file; F12 pauses)")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print how long each part of start-up took")
+    args = parser.parse_args()
+
+    if args.replay:
+        from recording import Recording
+        recording = Recording.load(args.replay)
+        ai = AlienInvasion(headless=True, resolution=recording.resolution, profile=args.profile)
+        report = ai.replay(recording, render=args.render)
+        print("Replayed {ticks} ticks in {seconds:.2f}s: {tps:.1f} ticks/s "
+              "(score {score}, level {level})".format(**report))
+        if not report['matches']:
+            print("Final state differs from the recording")
+            sys.exit(1)
+        print("Final state matches the recording")
+    elif args.headless:
+        resolution = None
+        if args.width and args.height:
+            resolution = (args.width, args.height)
+        ai = AlienInvasion(headless=True, resolution=resolution, profile=args.profile, seed=args.seed,
+                           record=args.record, capture=args.capture)
+        if args.startup_report:
+            print(ai.startupreport(), file=sys.stderr)
+        report = ai.simulate(args.frames, render=args.render)
+        print("Simulated {frames} frames in {seconds:.2f}s: {fps:.1f} fps "
+              "(score {score}, level {level})".format(**report))
+        print("Bullets: {bullets} live (peak {peak_bullets}), alien bullets: {alienbullets} live "
+              "(peak {peak_alienbullets}), {culled} culled, {refused} refused".format(**report['projectiles']))
+    else:
+        # Make a game instance, and run the game.
+        ai = AlienInvasion(profile=args.profile, seed=args.seed, record=args.record, capture=args.capture)
+        ai.report_startup = args.startup_report
+        ai.run_game()
@@ -1,12 +1,12 @@
-import pygame
 from pygame.sprite import Sprite
+from assetmanager import AssetManager
 
 
 class AlienExplosion(Sprite):
     """A class to represent a single explosion of a dead alien in the fleet."""
 
     def __init__(self, ai_game, alien):
-        """Initialize the explosion and set its starting position."""
+        """Initialize the explosion where the alien died; the fleet moves it from there."""
         super().__init__()
         self.screen = ai_game.screen
         self.settings = ai_game.settings
@@ -15,28 +15,32 @@ class AlienExplosion(Sprite):
         self.imageindex = 0
         self.explosions = ['images/explosionframe1.png', 'images/explosionframe2.png',
                            'images/explosionframe3.png', 'images/explosionframe4.png']
-        self.image = pygame.image.load(self.explosions[0])
-        self.rect = self.image.get_rect()
+        self.image = AssetManager.getinstance().getimage(self.explosions[0])
+        self.cellrect = self.image.get_rect()
+        self.cellrect.topleft = alien.rect.topleft
 
-        # Start each new explosion where the alien died
-        self.rect.x = alien.rect.x
-        self.rect.y = alien.rect.y
-
-        # Store the explosions's exact horizontal position.
-        self.x = float(self.rect.x)
+        # Set by Fleet.addexplosion()
+        self.fleet = None
+        self.column = alien.column
+        self.row = alien.row
+        self.rectversion = -1
 
         self.finished = False
 
-    def check_edges(self):
-        """Return True if explosion is at edge of screen."""
-        screen_rect = self.screen.get_rect()
-        if self.rect.right >= screen_rect.right or self.rect.left <= 0:
-            return True
-
-    def update(self):
-        """Move the explosion right or left."""
-        self.x += (self.settings.alien_speed * self.settings.fleet_direction)
-        self.rect.x = self.x
+    @property
+    def rect(self):
+        """The explosion's rect, derived from the fleet's position when first asked for each move."""
+        if self.fleet is None:
+            return self.cellrect
+        return self.fleet.memberrect(self)
+
+    def blitme(self, alpha=1.0):
+        """Draw the explosion between its last two positions."""
+        rect = self.rect
+        if self.fleet is not None:
+            return self.screen.blit(self.image, (self.fleet.memberx(self, alpha), rect.y))
+        else:
+            return self.screen.blit(self.image, rect)
 
     def nextframe(self):
         self.imageindex += 1
@@ -45,4 +49,4 @@ class AlienExplosion(Sprite):
             self.finished = True
             return
 
-        self.image = pygame.image.load(self.explosions[self.imageindex])
+        self.image = AssetManager.getinstance().getimage(self.explosions[self.imageindex])
@@ -0,0 +1,188 @@
+"""
+Packed asset bundle: every image pre-decoded into texture atlases in one file.
+
+    python assetbundle.py                  # pack images/*.png into assets.bundle
+
+At runtime the bundle is memory-mapped and each image is a subsurface of an atlas
+made straight from the mapped pixels, so nothing is decoded. Images whose loose
+file has changed since the bundle was built are loaded from the loose file instead.
+"""
+import os
+import sys
+import glob
+import json
+import mmap
+import struct
+import argparse
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+
+class AssetBundle:
+    """
+    A class to serve images from a bundle file.
+
+    File layout: a header (magic, version, index length), a JSON index, then one
+      block of raw pixels per atlas page, each aligned to 'alignment' bytes. The index
+      lists the pages (format, size, file offset) and, for each image path, its page,
+      its rect on the page and the size and modification time of the file it came from.
+    """
+
+    # magic, version, index length
+    header = struct.Struct('<4sHI')
+    magic = b'AIAB'
+    version = 1
+    alignment = 64
+    bytes_per_pixel = {'RGBA': 4, 'RGB': 3}
+
+    def __init__(self, path, data, index):
+        self.path = path
+        self.__data = data
+        self.__images = index['images']
+        view = memoryview(data)
+        # Surfaces made by frombuffer() share the mapped memory, so the map stays open for good
+        self.pages = [pygame.image.frombuffer(view[page['offset']:page['offset'] + page['length']],
+                                              tuple(page['size']), page['format'])
+                      for page in index['pages']]
+        self.hits = 0
+        self.stale = 0
+
+    @classmethod
+    def open(cls, path):
+        """Map the bundle at 'path'; return None if it is missing or not a bundle of this version."""
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            # The map outlives the file object
+            with open(path, 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, length = cls.header.unpack_from(data)
+            if magic != cls.magic or version != cls.version:
+                raise ValueError("not a version {} asset bundle".format(cls.version))
+            index = json.loads(bytes(data[cls.header.size:cls.header.size + length]))
+            return cls(path, data, index)
+        except (ValueError, KeyError, struct.error, OSError, pygame.error) as error:
+            print("Ignoring asset bundle {}: {}".format(path, error), file=sys.stderr)
+            return None
+
+    def getimage(self, path):
+        """Return the image at 'path' as a subsurface of its atlas, or None if it isn't bundled or is stale."""
+        entry = self.__images.get(path)
+        if entry is None:
+            return None
+
+        # A loose file that has changed since the build wins; a bundle may also ship without them
+        try:
+            source = os.stat(path)
+            if [source.st_size, source.st_mtime_ns] != entry['source']:
+                self.stale += 1
+                return None
+        except OSError:
+            pass
+
+        self.hits += 1
+        return self.pages[entry['page']].subsurface(entry['rect'])
+
+    @classmethod
+    def build(cls, paths, output):
+        """Decode the images at 'paths' and pack them into a bundle at 'output'."""
+        images = {path: pygame.image.load(path) for path in paths}
+        # Images with per-pixel alpha share an RGBA atlas; opaque ones (the background) an RGB one
+        groups = {'RGBA': [], 'RGB': []}
+        for path, image in images.items():
+            groups['RGBA' if image.get_flags() & pygame.SRCALPHA else 'RGB'].append(path)
+
+        pages = []
+        blocks = []
+        entries = {}
+        for fmt, group in groups.items():
+            if not group:
+                continue
+            sizes = {path: images[path].get_size() for path in group}
+            placements, size = cls.pack(sizes)
+            block = bytearray(size[0] * size[1] * cls.bytes_per_pixel[fmt])
+            stride = size[0] * cls.bytes_per_pixel[fmt]
+
+            for path, (x, y) in placements.items():
+                width, height = sizes[path]
+                pixels = pygame.image.tobytes(images[path], fmt)
+                row = width * cls.bytes_per_pixel[fmt]
+                start = y * stride + x * cls.bytes_per_pixel[fmt]
+                for line in range(height):
+                    block[start + line * stride:start + line * stride + row] = pixels[line * row:(line + 1) * row]
+
+                source = os.stat(path)
+                entries[path] = {'page': len(pages), 'rect': [x, y, width, height],
+                                 'source': [source.st_size, source.st_mtime_ns]}
+
+            pages.append({'format': fmt, 'size': list(size), 'length': len(block)})
+            blocks.append(block)
+
+        # Page offsets depend on the index's length, which depends on the offsets' digits;
+        #   lay the file out until it stops changing
+        offsets = [0] * len(pages)
+        while True:
+            for page, offset in zip(pages, offsets):
+                page['offset'] = offset
+            index = json.dumps({'pages': pages, 'images': entries}, separators=(',', ':')).encode()
+            position = cls.header.size + len(index)
+            layout = []
+            for block in blocks:
+                position += -position % cls.alignment
+                layout.append(position)
+                position += len(block)
+            if layout == offsets:
+                break
+            offsets = layout
+
+        # Write then rename, so a running game never maps a half-written bundle
+        with open(output + '.tmp', 'wb') as file:
+            file.write(cls.header.pack(cls.magic, cls.version, len(index)))
+            file.write(index)
+            for offset, block in zip(offsets, blocks):
+                file.write(bytes(offset - file.tell()))
+                file.write(block)
+        os.replace(output + '.tmp', output)
+        return entries
+
+    @staticmethod
+    def pack(sizes):
+        """
+        Place rectangles on shelves, tallest first; return ({key: (x, y)}, (width, height)).
+
+        The atlas is as wide as the widest rectangle, or enough for a roughly square atlas.
+        """
+        area = sum(width * height for width, height in sizes.values())
+        atlas_width = max(max(width for width, height in sizes.values()), int(area ** 0.5))
+
+        placements = {}
+        x = y = shelf = 0
+        for key in sorted(sizes, key=lambda key: (-sizes[key][1], key)):
+            width, height = sizes[key]
+            if x + width > atlas_width:
+                x = 0
+                y += shelf
+                shelf = 0
+            placements[key] = (x, y)
+            x += width
+            shelf = max(shelf, height)
+        return placements, (atlas_width, y + shelf)
+
+
+if __name__ == '__main__':
+    from settings import Settings
+
+    parser = argparse.ArgumentParser(description="Pack the game's images into an asset bundle")
+    parser.add_argument('--output', default=None, help="bundle file (default: Settings.asset_bundle)")
+    parser.add_argument('patterns', nargs='*', default=['images/*.png'], help="images to pack")
+    args = parser.parse_args()
+
+    output = args.output or Settings().asset_bundle
+    paths = sorted({path.replace(os.sep, '/') for pattern in args.patterns for path in glob.glob(pattern)})
+    if not paths:
+        parser.error("no images match " + " ".join(args.patterns))
+    entries = AssetBundle.build(paths, output)
+    print("Packed {} images into {} ({:,} bytes)".format(len(entries), output, os.path.getsize(output)))
@@ -0,0 +1,72 @@
+import pygame
+from assetbundle import AssetBundle
+
+
+# Singleton class AssetManager
+class AssetManager:
+    """A class to decode each image once and share it between sprites."""
+    __instance = None
+
+    @staticmethod
+    def getinstance():
+        # Static access
+        if AssetManager.__instance is None:
+            AssetManager()
+        return AssetManager.__instance
+
+    def __init__(self):
+        if AssetManager.__instance is not None:
+            raise Exception("Instance already exists")
+        else:
+            AssetManager.__instance = self
+            # path -> [surface, converted]
+            self.__images = {}
+            self.bundle = None
+            self.hits = 0
+            self.misses = 0
+
+    def openbundle(self, path):
+        """Serve images from the AssetBundle at 'path' where it has them; a missing bundle is ignored."""
+        # Every game in a process shares the one mapping
+        if self.bundle is None or self.bundle.path != path:
+            self.bundle = AssetBundle.open(path)
+
+    def getimage(self, path):
+        """Return the shared surface for an image. Callers must not modify it."""
+        entry = self.__images.get(path)
+
+        if entry is None:
+            self.misses += 1
+            image = self.bundle.getimage(path) if self.bundle is not None else None
+            if image is None:
+                image = pygame.image.load(path)
+            entry = [image, False]
+            self.__images[path] = entry
+        else:
+            self.hits += 1
+
+        # Images loaded before the display exists
+        #   are converted to the display's pixel format the first time they are used after it
+        if not entry[1] and pygame.display.get_surface() is not None:
+            if entry[0].get_flags() & pygame.SRCALPHA:
+                entry[0] = entry[0].convert_alpha()
+            else:
+                entry[0] = entry[0].convert()
+            entry[1] = True
+
+        return entry[0]
+
+    def copyimage(self, path):
+        """Return a private copy of an image for sprites that modify their pixels."""
+        return self.getimage(path).copy()
+
+    def preload(self, paths):
+        for path in paths:
+            self.getimage(path)
+
+    def clear(self):
+        self.__images.clear()
+
+    def stats(self):
+        return {'images': len(self.__images), 'hits': self.hits, 'misses': self.misses,
+                'bundled': self.bundle.hits if self.bundle is not None else 0}
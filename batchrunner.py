@@ -0,0 +1,308 @@
+"""
+Batch simulator for difficulty and balance sweeps.
+
+Plays many headless games on a pool of worker processes, each game with its own
+Settings overrides and bot, and aggregates the results per configuration:
+
+    python batchrunner.py --games 500 --bot tracker \\
+        --set speedup_scale=1.05,1.1,1.2 --set default_fire_interval=1500,2000
+
+Every combination of --set values is one configuration, played --games times with
+seeds derived from --seed. Results stream back as games finish and are folded into
+running totals, with at most a few games per worker in flight, so memory stays flat
+however many games are played.
+"""
+import os
+import sys
+import ast
+import json
+import math
+import random
+import argparse
+import itertools
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+
+class Bot:
+    """A player that sets the ship's controls before every tick."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def act(self, ai):
+        pass
+
+
+class RandomBot(Bot):
+    """Holds a random direction for a random time, and fires at random."""
+
+    def __init__(self, rng, turn_chance=0.02, fire_chance=0.05):
+        super().__init__(rng)
+        self.turn_chance = turn_chance
+        self.fire_chance = fire_chance
+
+    def act(self, ai):
+        if self.rng.random() < self.turn_chance:
+            direction = self.rng.choice((-1, 0, 1))
+            ai.ship.moving_left = direction < 0
+            ai.ship.moving_right = direction > 0
+        if self.rng.random() < self.fire_chance:
+            ai._fire_requested = True
+
+
+class SweepBot(Bot):
+    """Sweeps from edge to edge firing constantly, like the headless autopilot."""
+
+    def act(self, ai):
+        if ai.ship.rect.right >= ai.settings.screen_width:
+            ai.ship.moving_right, ai.ship.moving_left = False, True
+        elif ai.ship.rect.left <= 0 or not (ai.ship.moving_left or ai.ship.moving_right):
+            ai.ship.moving_right, ai.ship.moving_left = True, False
+        ai._fire_requested = True
+
+
+class TrackerBot(Bot):
+    """Moves under the nearest front-line alien and fires once lined up."""
+
+    def act(self, ai):
+        front = ai.fleet.frontaliens()
+        if not front:
+            return
+        ship_x = ai.ship.rect.centerx
+        target = min((alien.rect.centerx for alien in front), key=lambda x: abs(x - ship_x))
+        ai.ship.moving_left = target < ship_x - 4
+        ai.ship.moving_right = target > ship_x + 4
+        if abs(target - ship_x) <= ai.fleet.cell_width // 2:
+            ai._fire_requested = True
+
+
+bots = {'random': RandomBot, 'sweep': SweepBot, 'tracker': TrackerBot}
+
+
+# The headless game each worker process reuses, and its settings before any override
+_game = None
+_baseline = None
+
+
+def _initworker():
+    """Create the worker's game once; starting a game resets everything else."""
+    global _game, _baseline
+    from alien_invasion import AlienInvasion
+
+    _game = AlienInvasion(headless=True, profile=False)
+    _baseline = {name: value for name, value in vars(_game.settings).items()
+                 if isinstance(value, (bool, int, float, str, tuple))}
+
+
+def play(config, overrides, bot, seed, max_seconds):
+    """Play one game to game over (or max_seconds of simulated time) and return its result."""
+    ai = _game
+    vars(ai.settings).update(_baseline)
+    vars(ai.settings).update(overrides)
+
+    ai._start_game(seed)
+    # Starting a game resets the dynamic settings, so overrides of those are applied again
+    vars(ai.settings).update(overrides)
+    ai._reset_alien_shoot_timer()
+
+    player = bots[bot](random.Random(seed))
+    step = 1 / ai.settings.tick_rate
+    max_ticks = int(max_seconds * ai.settings.tick_rate)
+    ticks = 0
+    while ai.stats.game_active and ticks < max_ticks:
+        player.act(ai)
+        ai._step(step)
+        ticks += 1
+
+    return {
+        'config': config,
+        'seed': seed,
+        'level': ai.stats.level,
+        'score': ai.stats.score,
+        'survival': round(ticks * step, 3),
+        'finished': not ai.stats.game_active,
+    }
+
+
+class Summary:
+    """Running count, mean, deviation and range of a series, in constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.__squares = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        # Welford's update keeps the variance accurate without storing the values
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.__squares += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def report(self):
+        deviation = math.sqrt(self.__squares / (self.count - 1)) if self.count > 1 else 0.0
+        return {'mean': round(self.mean, 3), 'stdev': round(deviation, 3),
+                'min': self.minimum, 'max': self.maximum}
+
+
+class ConfigResults:
+    """The aggregated results of every game played with one configuration."""
+
+    def __init__(self, overrides):
+        self.overrides = overrides
+        self.games = 0
+        self.finished = 0
+        self.score = Summary()
+        self.survival = Summary()
+        self.levels = Counter()
+
+    def add(self, result):
+        self.games += 1
+        self.finished += result['finished']
+        self.score.add(result['score'])
+        self.survival.add(result['survival'])
+        self.levels[result['level']] += 1
+
+    def report(self):
+        # Levels are small integers, so their distribution is kept exactly
+        median = None
+        seen = 0
+        for level in sorted(self.levels):
+            seen += self.levels[level]
+            if seen * 2 >= self.games:
+                median = level
+                break
+
+        return {
+            'overrides': self.overrides,
+            'games': self.games,
+            'game_overs': self.finished,
+            'level': {'median': median, 'max': max(self.levels) if self.levels else None,
+                      'histogram': {str(level): self.levels[level] for level in sorted(self.levels)}},
+            'score': self.score.report(),
+            'survival_seconds': self.survival.report(),
+        }
+
+
+class BatchRunner:
+    """A class to fan games out over worker processes and gather their results as they finish."""
+
+    def __init__(self, configs, games, bot='random', seed=0, max_seconds=600, workers=None, window=4):
+        """
+        Prepare a sweep of 'games' games for each configuration (a dict of Settings overrides).
+
+        At most 'window' games per worker are queued at any time.
+        """
+        self.configs = configs
+        self.games = games
+        self.bot = bot
+        self.seed = seed
+        self.max_seconds = max_seconds
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window * self.workers
+
+    def jobs(self):
+        """Yield the arguments of every game, lazily."""
+        seeds = random.Random(self.seed)
+        for game in range(self.games):
+            for config, overrides in enumerate(self.configs):
+                yield config, overrides, self.bot, seeds.getrandbits(63), self.max_seconds
+
+    def run(self, progress=None):
+        """Play every game and return the report; 'progress' is called with each result."""
+        results = [ConfigResults(overrides) for overrides in self.configs]
+        jobs = self.jobs()
+        pending = set()
+        start = perf_counter()
+
+        with ProcessPoolExecutor(self.workers, initializer=_initworker) as pool:
+            while True:
+                # Keep the pool busy without queueing the whole sweep
+                for job in itertools.islice(jobs, self.window - len(pending)):
+                    pending.add(pool.submit(play, *job))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results[result['config']].add(result)
+                    if progress is not None:
+                        progress(result)
+
+        seconds = perf_counter() - start
+        played = sum(config.games for config in results)
+
+        return {
+            'bot': self.bot,
+            'seed': self.seed,
+            'workers': self.workers,
+            'games': played,
+            'seconds': round(seconds, 2),
+            'games_per_second': round(played / seconds, 2) if seconds else 0.0,
+            'configs': [config.report() for config in results],
+        }
+
+
+def parseoverrides(options):
+    """Turn ['name=value,value', ...] into the list of every combination of overrides."""
+    from settings import Settings
+    settings = Settings()
+
+    names = []
+    choices = []
+    for option in options:
+        name, _, values = option.partition('=')
+        if not hasattr(settings, name) or not values:
+            raise ValueError("expected an existing Settings attribute as name=value[,value...]: " + option)
+        names.append(name)
+        choices.append([ast.literal_eval(value) for value in values.split(',')])
+
+    return [dict(zip(names, combination)) for combination in itertools.product(*choices)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Alien Invasion batch simulator")
+    parser.add_argument('--games', type=int, default=100, help="games per configuration")
+    parser.add_argument('--bot', choices=sorted(bots), default='random')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE[,VALUE...]',
+                        help="Settings override; several values sweep it, several --set options are combined")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-minutes', type=float, default=10, help="simulated minutes after which a game is cut off")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--output', help="write the JSON report to this file instead of standard output")
+    args = parser.parse_args()
+
+    try:
+        configs = parseoverrides(args.set)
+    except (ValueError, SyntaxError) as error:
+        parser.error(str(error))
+
+    runner = BatchRunner(configs, args.games, args.bot, args.seed, args.max_minutes * 60, args.workers)
+    total = args.games * len(configs)
+    finished = 0
+
+    def progress(result):
+        global finished
+        finished += 1
+        if finished % 50 == 0 or finished == total:
+            print("{}/{} games".format(finished, total), file=sys.stderr)
+
+    report = runner.run(progress)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
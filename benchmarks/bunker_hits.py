@@ -0,0 +1,111 @@
+"""
+Bunker damage benchmark: hits per second of the PIL implementation versus the NumPy one.
+
+Run from the repository root:
+    python -m benchmarks.bunker_hits [--hits N]
+"""
+import os
+import random
+import argparse
+from time import perf_counter
+from types import SimpleNamespace
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from bunker import Bunker
+from settings import Settings
+
+
+class LegacyBunker(Bunker):
+    """The original bunker collision code, which round-trips the image through PIL on every hit."""
+
+    def validhit(self, bullet, alienbullet=False):
+        from convertimage import ConvertImage
+        image = ConvertImage.topil(self.image)
+
+        originalrect = bullet.rect
+        bullet.rect = bullet.rect.clip(self.rect)
+
+        if alienbullet:
+            offset = tuple((bullet.rect.bottomleft[0] - self.rect.topleft[0],
+                            bullet.rect.bottomleft[1] - self.rect.topleft[1]))
+            y = offset[1] - bullet.rect.height
+            y2 = offset[1]
+        else:
+            offset = tuple((bullet.rect.topleft[0] - self.rect.topleft[0],
+                            bullet.rect.topleft[1] - self.rect.topleft[1]))
+            y = offset[1]
+            y2 = offset[1] + bullet.rect.height
+
+        for x in range(offset[0], offset[0] + bullet.rect.width):
+            for y in range(y, y2):
+                pixel = image.getpixel((x, y))
+                if pixel[3] != 0:
+                    self.legacyhit(offset, self.settings.explosionradius)
+                    return True
+
+        bullet.rect = originalrect
+        return False
+
+    def legacyradiuscoordinates(self, image, offset, radius):
+        coordinates = []
+
+        for x in range(image.size[0]):
+            for y in range(image.size[1]):
+                xdiff = x - offset[0]
+                ydiff = y - offset[1]
+                if xdiff * xdiff + ydiff * ydiff <= radius * radius:
+                    coordinates.append((x, y))
+
+        return coordinates
+
+    def legacyhit(self, offset, radius):
+        from convertimage import ConvertImage
+        image = ConvertImage.topil(self.image)
+
+        for extra, chance in ((10, 10), (5, 4), (0, 0)):
+            for point in self.legacyradiuscoordinates(ConvertImage.topil(self.image), offset, radius + extra):
+                if chance == 0 or random.randint(0, chance) == 1:
+                    pixel = list(image.getpixel(point))
+                    pixel[3] = 0
+                    image.putpixel(point, tuple(pixel))
+
+        self.image = ConvertImage.topygame(image)
+
+
+def run(bunkerclass, hits, seed=0):
+    """Fire player bullets at fresh bunkers until 'hits' hits land; return hits per second."""
+    random.seed(seed)
+    ai_game = SimpleNamespace(screen=pygame.Surface((1200, 800)), settings=Settings(), rng=random.Random(seed))
+    bullet = SimpleNamespace(rect=pygame.Rect(0, 0, ai_game.settings.bullet_width, ai_game.settings.bullet_height))
+
+    landed = 0
+    elapsed = 0.0
+    while landed < hits:
+        # A bunker takes a handful of hits before most shots pass straight through
+        bunker = bunkerclass(ai_game)
+        bunker.rect.topleft = (0, 0)
+        for shot in range(20):
+            bullet.rect = pygame.Rect(random.randrange(bunker.rect.width - 3), bunker.rect.height - 10,
+                                      ai_game.settings.bullet_width, ai_game.settings.bullet_height)
+            start = perf_counter()
+            hit = bunker.validhit(bullet)
+            elapsed += perf_counter() - start
+            if hit:
+                landed += 1
+
+    return landed / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bunker damage benchmark")
+    parser.add_argument('--hits', type=int, default=200)
+    args = parser.parse_args()
+
+    pygame.init()
+    before = run(LegacyBunker, args.hits)
+    after = run(Bunker, args.hits)
+    print("PIL:   {:10.1f} hits/s".format(before))
+    print("NumPy: {:10.1f} hits/s".format(after))
+    print("Speedup: {:.1f}x".format(after / before))
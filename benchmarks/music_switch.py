@@ -0,0 +1,88 @@
+"""
+Music tempo change benchmark: the worst frame time around a tempo change, streaming
+the mp3s with pygame.mixer.music (the original approach) versus MusicPlayer.
+
+Run from the repository root:
+    python -m benchmarks.music_switch [--switches N]
+
+Each approach renders headless game frames and changes tempo every 'interval' frames;
+the frames that made a change are compared with the frames that did not.
+"""
+import os
+import argparse
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from alien_invasion import AlienInvasion
+from musicplayer import MusicCache, MusicPlayer
+
+files = ['sounds/backgroundmusic.mp3', 'sounds/backgroundmusic110.mp3',
+         'sounds/backgroundmusic133.mp3', 'sounds/backgroundmusic150.mp3']
+speeds = [1, 1.1, 1.33, 1.5]
+
+
+class LegacyMusic:
+    """The original tempo change: load the next mp3, restart it and seek."""
+
+    def __init__(self):
+        self.index = 0
+        self.duration = 0.0
+        pygame.mixer.music.load(files[0])
+        pygame.mixer.music.play(-1, 0.0)
+
+    def switch(self, index):
+        self.duration += pygame.mixer.music.get_pos() * speeds[self.index] / 1000
+        self.index = index
+        self.duration %= 130 / speeds[index]
+        pygame.mixer.music.load(files[index])
+        pygame.mixer.music.play(-1, 0.0)
+        pygame.mixer.music.set_pos(self.duration)
+        pygame.mixer.music.set_volume(0.1)
+
+    def update(self):
+        pass
+
+    def stop(self):
+        pygame.mixer.music.stop()
+
+
+def run(ai, music, switches, interval):
+    """Return (worst frame ms with a tempo change, worst frame ms without one)."""
+    changed = []
+    steady = []
+    for frame in range(switches * interval):
+        start = perf_counter()
+        music.update()
+        if frame % interval == interval - 1:
+            music.switch((frame // interval + 1) % len(files))
+        ai.simulate(1, render=True)
+        elapsed = (perf_counter() - start) * 1000
+        (changed if frame % interval == interval - 1 else steady).append(elapsed)
+    music.stop()
+    return max(changed), max(steady)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Music tempo change benchmark")
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--interval', type=int, default=30, help="frames between tempo changes")
+    args = parser.parse_args()
+
+    ai = AlienInvasion(headless=True, profile=False, seed=0)
+    pygame.mixer.init()
+    pygame.mixer.set_reserved(2)
+
+    start = perf_counter()
+    player = MusicPlayer(files, speeds, MusicCache(ai.settings.music_cache),
+                         [pygame.mixer.Channel(0), pygame.mixer.Channel(1)])
+    print("MusicPlayer ready in {:.2f}s".format(perf_counter() - start))
+    player.play(0)
+
+    for name, music in (('mixer.music', LegacyMusic()), ('MusicPlayer', player)):
+        worst_change, worst_steady = run(ai, music, args.switches, args.interval)
+        print("{:<12} worst frame with a tempo change {:7.2f} ms, without {:7.2f} ms".format(
+            name, worst_change, worst_steady))
@@ -0,0 +1,253 @@
+"""
+Scenario benchmarks: drive headless games through scripted situations and report
+frames per second and per-phase frame timings as JSON.
+
+Run from the repository root:
+    python -m benchmarks.scenarios [scenario ...] [--frames N] [--repeat R]
+                                   [--output results.json] [--compare baseline.json]
+
+Every scenario starts from a fresh game with the random generators seeded, and the
+simulation advances one fixed tick per frame, so two runs of the same tree do exactly
+the same work. With --compare, scenarios whose frames per second dropped by more
+than --tolerance against an earlier results file are reported and the exit status is 1.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+from time import perf_counter
+from types import SimpleNamespace
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# Keep standard output clean for the JSON results
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from alien_invasion import AlienInvasion
+from alienbullet import AlienBullet
+from bullet import Bullet
+
+
+class Scenario:
+    """A scripted situation: set up a fresh game, then nudge it before every frame."""
+
+    # Run the game's autopilot (sweep the ship and fire constantly)
+    autopilot = False
+    # Frames run before measuring, so caches and pools are warm
+    warmup = 120
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def setup(self, ai, rng):
+        """Start a game and shape it for the scenario."""
+        ai._start_game()
+        # The ship can't be destroyed, so the game never freezes for an explosion
+        ai._ship_hit = lambda: None
+
+    def frame(self, ai, rng):
+        """Run one frame."""
+        self.prepare(ai, rng)
+        ai._simulate_frame(1 / ai.settings.tick_rate, True, self.autopilot)
+
+    def prepare(self, ai, rng):
+        """Adjust the game before a frame."""
+        # Lift the formation back to its starting height when it reaches the bunkers, so the load stays steady
+        if ai.fleet.bottom() >= ai.bunker_top:
+            ai.fleet.drop(ai.fleet.cell_height - ai.fleet.origin_y)
+
+
+class FullFleet(Scenario):
+
+    def __init__(self):
+        super().__init__('level1', "a full fleet at level 1, the ship holding fire")
+
+
+class MaxSpeed(Scenario):
+    autopilot = True
+
+    def __init__(self, level=30):
+        super().__init__('level30', "level {} at capped speeds, the ship sweeping and firing".format(level))
+        self.level = level
+
+    def setup(self, ai, rng):
+        super().setup(ai, rng)
+        for level in range(2, self.level + 1):
+            ai.settings.increase_speed(level)
+        ai.stats.level = self.level
+        ai.sb.prep_level()
+        ai._reset_alien_shoot_timer()
+
+
+class BunkerStorm(Scenario):
+    """Bullets hit every bunker from both sides every frame; the wall is rebuilt as it wears away."""
+
+    def __init__(self, rebuild=240):
+        super().__init__('bunker_storm', "an alien and a player bullet striking every bunker each frame")
+        self.rebuild = rebuild
+        self.frames = 0
+
+    def setup(self, ai, rng):
+        super().setup(ai, rng)
+        self.frames = 0
+
+    def prepare(self, ai, rng):
+        super().prepare(ai, rng)
+        self.frames += 1
+        if self.frames % self.rebuild == 0:
+            ai.bunkers.empty()
+            ai._create_bunker_wall()
+
+        for bunker in ai.bunkers.sprites():
+            x = bunker.rect.left + rng.randrange(bunker.rect.width)
+            # An alien bullet about to enter the top, and a player bullet about to enter the bottom
+            alien = SimpleNamespace(rect=pygame.Rect(x, bunker.rect.top - 2, 1, 0))
+            ai.alienbullets.add(AlienBullet(ai, alien))
+
+            bullet = Bullet(ai)
+            bullet.rect.midtop = (x, bunker.rect.bottom - 2)
+            bullet.y = bullet.previous_y = float(bullet.rect.y)
+            ai.bullets.add(bullet)
+
+
+class BulletFlood(Scenario):
+    """Alien bullets rain from random points above the ship at a steady rate."""
+
+    def __init__(self, rate=3):
+        super().__init__('bullet_flood', "{} alien bullets spawned per frame at random points".format(rate))
+        self.rate = rate
+
+    def prepare(self, ai, rng):
+        super().prepare(ai, rng)
+        for _ in range(self.rate):
+            position = (rng.randrange(ai.settings.screen_width), rng.randrange(ai.settings.screen_height // 2))
+            alien = SimpleNamespace(rect=pygame.Rect(position, (0, 0)))
+            ai.alienbullets.add(AlienBullet(ai, alien))
+
+
+class MenuIdle(Scenario):
+    """The main menu, with no input, through the real main loop's frame."""
+    warmup = 10
+
+    def __init__(self):
+        super().__init__('menu_idle', "the main menu with no input")
+
+    def setup(self, ai, rng):
+        pass
+
+    def frame(self, ai, rng):
+        ai._run_frame(1 / ai.settings.frame_cap)
+
+
+scenarios = [FullFleet(), MaxSpeed(), BunkerStorm(), BulletFlood(), MenuIdle()]
+
+
+def run(scenario, frames, seed=0):
+    """Run a scenario in a fresh headless game and return its measurements."""
+    rng = random.Random(seed)
+    ai = AlienInvasion(headless=True, profile=False, seed=seed)
+    scenario.setup(ai, rng)
+
+    for _ in range(scenario.warmup):
+        scenario.frame(ai, rng)
+
+    ai.profiler.enable(overlay=False, export=False)
+    ai.profiler.reset()
+    start = perf_counter()
+    for _ in range(frames):
+        scenario.frame(ai, rng)
+    seconds = perf_counter() - start
+    ai.profiler.disable()
+
+    return {
+        'description': scenario.description,
+        'frames': frames,
+        'seconds': round(seconds, 4),
+        'fps': round(frames / seconds, 2) if seconds else 0.0,
+        'phases': ai.profiler.summary(),
+        'state': {
+            'score': ai.stats.score,
+            'level': ai.stats.level,
+            'aliens': len(ai.aliens),
+            'bunkers': len(ai.bunkers),
+            'projectiles': ai.projectiles.stats(),
+        },
+    }
+
+
+def runall(names, frames, repeat=1, seed=0):
+    """Run the named scenarios (all of them if none), keeping the fastest of 'repeat' runs of each."""
+    results = {}
+    for scenario in scenarios:
+        if names and scenario.name not in names:
+            continue
+        runs = [run(scenario, frames, seed) for _ in range(repeat)]
+        results[scenario.name] = max(runs, key=lambda result: result['fps'])
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'sdl': '.'.join(str(part) for part in pygame.get_sdl_version()),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+        },
+        'parameters': {'frames': frames, 'repeat': repeat, 'seed': seed},
+        'scenarios': results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return (scenario, baseline fps, current fps) for each scenario that slowed down past 'tolerance'."""
+    regressions = []
+    for name, result in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None or not before['fps']:
+            continue
+        if result['fps'] < before['fps'] * (1 - tolerance):
+            regressions.append((name, before['fps'], result['fps']))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Alien Invasion scenario benchmarks")
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help="scenarios to run: {} (default: all)".format(', '.join(s.name for s in scenarios)))
+    parser.add_argument('--frames', type=int, default=1000, help="measured frames per scenario")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scenario, keeping the fastest")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON results to this file instead of standard output")
+    parser.add_argument('--compare', metavar='BASELINE', help="a results file from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="fractional fps drop against the baseline that counts as a regression")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(s.name for s in scenarios)
+    if unknown:
+        parser.error("unknown scenario(s): {}".format(', '.join(sorted(unknown))))
+
+    results = runall(args.scenarios, args.frames, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        for name, result in results['scenarios'].items():
+            frame = result['phases']['frame']
+            print("{:<14}{:10.1f} fps   p50 {:6.2f} ms   p99 {:6.2f} ms".format(name, result['fps'], frame['p50'],
+                                                                          frame['p99']))
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print("REGRESSION {}: {:.1f} -> {:.1f} fps".format(name, before, after), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -16,16 +16,19 @@ class Bullet(Sprite):
         self.rect = pygame.Rect(0, 0, self.settings.bullet_width, self.settings.bullet_height)
         self.rect.midtop = ai_game.ship.rect.midtop
         
-        # Store the bullet's position as a decimal value.
+        # Store the bullet's position as a decimal value, and where it was last tick.
         self.y = float(self.rect.y)
+        self.previous_y = self.y
 
-    def update(self):
+    def update(self, dt):
         """Move the bullet up the screen."""
+        self.previous_y = self.y
         # Update the decimal position of the bullet.
-        self.y -= self.settings.bullet_speed
+        self.y -= self.settings.bullet_speed * dt
         # Update the rect position.
         self.rect.y = self.y
 
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
+    def draw_bullet(self, alpha=1.0):
+        """Draw the bullet between its last two positions."""
+        y = self.previous_y + (self.y - self.previous_y) * alpha
+        return pygame.draw.rect(self.screen, self.color, (self.rect.x, y, self.rect.width, self.rect.height))
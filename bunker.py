@@ -1,21 +1,34 @@
 import pygame
 from pygame.sprite import Sprite
-from convertimage import ConvertImage
-import random
+from assetmanager import AssetManager
+import numpy
 
 
 class Bunker(Sprite):
     """A class to represent a single bunker."""
 
+    # Number of pre-rolled damage patterns kept per explosion radius
+    stencil_count = 16
+    # radius -> list of boolean damage stencils, shared by all bunkers
+    __stencils = {}
+
     def __init__(self, ai_game):
         """Initialize the bunker and set its starting position."""
         super().__init__()
         self.screen = ai_game.screen
         self.settings = ai_game.settings
+        # The game's random generator, so damage is reproducible
+        self.rng = ai_game.rng
 
-        # Load the bunker image and set its rect attribute.
-        self.image = pygame.image.load('images/bunker.png')
+        # Share the bunker image until the first hit, then take a private copy (copy-on-write).
+        self.image = AssetManager.getinstance().getimage('images/bunker.png')
+        self.__ownsimage = False
         self.rect = self.image.get_rect()
+        # Hits taken, so copies of the image can tell when they are out of date
+        self.hits = 0
+
+        # Solid (alpha != 0) pixels of the bunker, indexed [x, y]; built on the first collision
+        self.__solid = None
 
         # Start each new bunker near the bottom left of the screen.
         self.rect.x = self.rect.width
@@ -26,84 +39,82 @@ class Bunker(Sprite):
 
     """When a collision occurs, check to see if see if pixels are valid (Alpha != 0)"""
     def validhit(self, bullet, alienbullet=False):
-        image = ConvertImage.topil(self.image)
+        if self.__solid is None:
+            self.__solid = pygame.surfarray.array_alpha(self.image) != 0
 
         # Crop the bullet inside the bunker to ensure coordinates are valid
-        # Save the original rect to restore if there is not a collision
-        originalrect = bullet.rect
-        bullet.rect = bullet.rect.clip(self.rect)
+        area = bullet.rect.clip(self.rect)
+        x = area.x - self.rect.x
+        y = area.y - self.rect.y
+
+        # Check the alpha of every pixel in the bullet's rect area at once
+        if not self.__solid[x:x + area.width, y:y + area.height].any():
+            return False
 
         # Different coordinate offsets must be used depending on the bullet type
         # By default, game assumes that the bullet is a player bullet
         # [Player's bullet travels up, Alien's bullet travels down]
         if alienbullet:
-            offset = tuple((bullet.rect.bottomleft[0] - self.rect.topleft[0],
-                            bullet.rect.bottomleft[1] - self.rect.topleft[1]))
-            y = offset[1] - bullet.rect.height
-            y2 = offset[1]
+            self.__hit((x, y + area.height), self.settings.explosionradius)
         else:
-            offset = tuple((bullet.rect.topleft[0] - self.rect.topleft[0],
-                            bullet.rect.topleft[1] - self.rect.topleft[1]))
-            y = offset[1]
-            y2 = offset[1] + bullet.rect.height
-
-        # Check the alpha of each of the coordinates in the bullet's rect area
-        for x in range(offset[0], offset[0] + bullet.rect.width):
-            for y in range(y, y2):
-                pixel = image.getpixel((x, y))
-                if pixel[3] != 0:
-                    # If there is a collision, stop checking pixels, call collision functions, and return True
-                    self.__hit(offset, self.settings.explosionradius)
-                    return True
-
-        # If there is not a collision, restore the bullet's rect and return False
-        bullet.rect = originalrect
-        return False
-
-    """When a bunker is hit, destroy pixels in radius. This method returns a valid list of coordinates for a radius"""
-    def __getradiuscoordinates(self, offset, radius):
-        image = ConvertImage.topil(self.image)
-        coordinates = []
-
-        for x in range(image.size[0]):
-            for y in range(image.size[1]):
-                # Calculate if a point is inside (or on) the circle
-                xdiff = x - offset[0]
-                ydiff = y - offset[1]
-                # Slightly increased performace over using ** operator; suttering for computations is less pronounced
-                if xdiff * xdiff + ydiff * ydiff <= radius * radius:
-                    coordinates.append((x, y))
-
-        return coordinates
+            self.__hit((x, y), self.settings.explosionradius)
+
+        return True
+
+    @classmethod
+    def __getstencils(cls, radius):
+        """
+        Return the damage stencils for a radius, building them on first use.
+
+        Each stencil is a square boolean array centred on the hit: every pixel within
+          'radius' is destroyed, 25% of pixels within 'radius + 5' and 10% of pixels
+          within 'radius + 10'.
+        """
+        stencils = cls.__stencils.get(radius)
+
+        if stencils is None:
+            outer = radius + 10
+            xdiff, ydiff = numpy.ogrid[-outer:outer + 1, -outer:outer + 1]
+            distance = xdiff * xdiff + ydiff * ydiff
+
+            # Chance of destroying a pixel, combining the three circles of the original effect
+            chance = numpy.zeros(distance.shape)
+            chance[distance <= outer * outer] = 1 / 11
+            chance[distance <= (radius + 5) * (radius + 5)] = 1 - (10 / 11) * (4 / 5)
+            chance[distance <= radius * radius] = 1
+
+            generator = numpy.random.default_rng(radius)
+            stencils = [generator.random(chance.shape) < chance for _ in range(cls.stencil_count)]
+            cls.__stencils[radius] = stencils
+
+        return stencils
 
     """On a confirmed collision, destroy pixels in a radius around the hit"""
     def __hit(self, offset, radius):
-        image = ConvertImage.topil(self.image)
-
-        # 10% of destruction in outer most circle
-        coordindates = self.__getradiuscoordinates(offset, radius + 10)
-        for point in coordindates:
-            if random.randint(0, 10) == 1:
-                pixel = list(image.getpixel(point))
-                # Set alpha of pixel to 0
-                pixel[3] = 0
-                image.putpixel(point, tuple(pixel))
-
-        # 25% chance of destruction in second circle
-        coordindates = self.__getradiuscoordinates(offset, radius + 5)
-        for point in coordindates:
-            if random.randint(0, 4) == 1:
-                pixel = list(image.getpixel(point))
-                # Set alpha of pixel to 0
-                pixel[3] = 0
-                image.putpixel(point, tuple(pixel))
-
-        # 100% of destruction in base circle
-        coordindates = self.__getradiuscoordinates(offset, radius)
-        for point in coordindates:
-            pixel = list(image.getpixel(point))
-            # Set alpha of pixel to 0
-            pixel[3] = 0
-            image.putpixel(point, tuple(pixel))
-
-        self.image = ConvertImage.topygame(image)
+        if not self.__ownsimage:
+            self.image = self.image.copy()
+            self.__ownsimage = True
+        self.hits += 1
+
+        stencils = self.__getstencils(radius)
+        stencil = stencils[self.rng.randrange(len(stencils))]
+
+        # Clip the stencil's square to the bunker
+        outer = radius + 10
+        width, height = self.__solid.shape
+        left = max(offset[0] - outer, 0)
+        top = max(offset[1] - outer, 0)
+        right = min(offset[0] + outer + 1, width)
+        bottom = min(offset[1] + outer + 1, height)
+        if left >= right or top >= bottom:
+            return
+
+        stencil = stencil[left - (offset[0] - outer):right - (offset[0] - outer),
+                          top - (offset[1] - outer):bottom - (offset[1] - outer)]
+
+        # Set alpha of the destroyed pixels to 0, directly in the surface's pixel data
+        alpha = pygame.surfarray.pixels_alpha(self.image)
+        alpha[left:right, top:bottom][stencil] = 0
+        del alpha
+
+        self.__solid[left:right, top:bottom][stencil] = False
@@ -1,4 +1,5 @@
 import pygame.font
+from textcache import TextCache
 
 
 class Button:
@@ -12,7 +13,8 @@ class Button:
         self.width, self.height = 200, 50
         self.button_color = (0, 255, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font_size = 48
+        self.font = TextCache.getinstance().getfont(self.font_size)
         
         # Build the button's rect object and center it.
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -21,19 +23,21 @@ class Button:
         self.rect.y += offset[1]
 
         self.msg = msg
-        self.msg_image = self.font.render(msg, True, self.text_color, self.button_color)
-        self.msg_image_rect = self.msg_image.get_rect()
-        self.msg_image_rect.center = self.rect.center
+        self.msg_image = None
+        self.msg_image_rect = None
+        self.prep_msg()
 
     def prep_msg(self):
-        """Turn msg into a rendered image and center text on the button."""
-        self.msg_image = self.font.render(self.msg, True, self.text_color, self.button_color)
+        """Turn msg into a rendered image (once) and center text on the button."""
+        self.msg_image = TextCache.getinstance().render(self.msg, self.font_size, self.text_color, self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
 
-    def draw_button(self):
-        # Draw blank button and then draw message.
-        self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
+    def draw_button(self, surface=None):
+        # Draw blank button and then draw message, to the screen unless told otherwise.
+        if surface is None:
+            surface = self.screen
+        surface.fill(self.button_color, self.rect)
+        surface.blit(self.msg_image, self.msg_image_rect)
 
     # utilize same functionality, adjust centering slightly and create new class
@@ -0,0 +1,299 @@
+"""
+Gym-style environments for training bots against the real game rules.
+
+    env = VectorEnv(8, seed=0)
+    observations = env.reset()
+    while training:
+        actions = policy(observations)                    # shape (8,), values 0-5
+        observations, rewards, dones, infos = env.step(actions)
+
+Games run headlessly, each on its own off-screen surface, and a finished game is
+reset automatically. Observations and rewards are written into arrays allocated
+once, so the arrays returned by step() are overwritten by the next call: copy them
+to keep them.
+"""
+import os
+import heapq
+import argparse
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy
+import pygame
+from alien_invasion import AlienInvasion
+
+
+class AlienInvasionEnv:
+    """
+    One headless game behind a reset()/step(action) interface.
+
+    Actions: 0 nothing, 1 left, 2 right, 3 fire, 4 left and fire, 5 right and fire.
+      Each step holds the action for 'ticks_per_step' simulation ticks. The reward is
+      the score gained, less 'death_penalty' for each ship lost.
+
+    The observation is a float32 feature vector (see features()). With 'frame' set
+      to a (width, height) size, a grayscale uint8 image of the playfield at that size
+      is also produced every step, in self.frame (see drawframe()).
+    """
+
+    actions = 6
+    # Alien bullets described in the observation, lowest (closest to the ship) first
+    bullet_slots = 8
+    # Number of scalar features before the fleet's cells
+    scalars = 12
+
+    def __init__(self, seed=None, ticks_per_step=4, death_penalty=100.0, max_steps=None, frame=None,
+                 resolution=None, observation=None, frame_buffer=None):
+        """
+        Create the game; 'observation' and 'frame_buffer' may be views into arrays shared by
+          a VectorEnv, otherwise the environment allocates its own.
+        """
+        self.ai = AlienInvasion(headless=True, resolution=resolution, profile=False, seed=seed)
+        self.settings = self.ai.settings
+        self.ticks_per_step = ticks_per_step
+        self.step_time = 1 / self.settings.tick_rate
+        self.death_penalty = death_penalty
+        self.max_steps = max_steps
+        self.steps = 0
+
+        # The fleet only exists once a game has started. Its size is fixed by the screen,
+        #   so the first game's fleet sizes the observation for every game after it
+        self.ai._start_game()
+        fleet = self.ai.fleet
+        self.size = self.scalars + fleet.rows * fleet.columns + 3 * self.bullet_slots
+        self.observation = numpy.zeros(self.size, numpy.float32) if observation is None else observation
+
+        self.frame_size = frame
+        self.frame = None
+        if frame is not None:
+            self.frame = numpy.zeros((frame[1], frame[0]), numpy.uint8) if frame_buffer is None else frame_buffer
+            self.__small = pygame.Surface(frame, 0, self.ai.screen)
+            # The sum of each pixel's channels
+            self.__sum = numpy.zeros(frame, numpy.uint16)
+            self.__scalex = frame[0] / self.settings.screen_width
+            self.__scaley = frame[1] / self.settings.screen_height
+            self.__backdrop = None
+            # Sprite images scaled to the frame, keyed by the full size image
+            self.__scaled = {}
+            # Each bunker's hits and scaled image, rescaled only when it is hit
+            self.__bunkers = {}
+
+    def reset(self, seed=None):
+        """Start a new game and return its first observation."""
+        self.ai._start_game(seed)
+        self.steps = 0
+        return self.observe()
+
+    def step(self, action):
+        """Play one action; return (observation, reward, done, info)."""
+        ai = self.ai
+        ai.ship.moving_left = action in (1, 4)
+        ai.ship.moving_right = action in (2, 5)
+        ai._fire_requested = action >= 3
+
+        score = ai.stats.score
+        ships = ai.stats.ships_left
+        for _ in range(self.ticks_per_step):
+            ai._step(self.step_time)
+            if not ai.stats.game_active:
+                break
+        self.steps += 1
+
+        reward = ai.stats.score - score
+        lost = ships - ai.stats.ships_left + (0 if ai.stats.game_active else 1)
+        reward -= self.death_penalty * lost
+        truncated = self.max_steps is not None and self.steps >= self.max_steps
+        done = not ai.stats.game_active or truncated
+
+        info = {'score': ai.stats.score, 'level': ai.stats.level, 'truncated': truncated and ai.stats.game_active}
+        return self.observe(), reward, done, info
+
+    def observe(self):
+        """Write the current state into the observation (and frame) buffers and return the observation."""
+        self.features(self.observation)
+        if self.frame is not None:
+            self.drawframe()
+        return self.observation
+
+    def features(self, out):
+        """
+        Fill 'out' with the game state, scaled to about -1..1:
+
+          ship x, exploding, ships left, level, fleet x, fleet y, fleet direction,
+          alien speed, fleet bottom, UFO present, UFO x, player bullets in flight;
+          then 1 for each live alien cell, row by row;
+          then (present, dx, dy) of the lowest alien bullets, relative to the ship.
+        """
+        ai = self.ai
+        settings = self.settings
+        width = settings.screen_width
+        height = settings.screen_height
+        fleet = ai.fleet
+
+        out[0] = ai.ship.x / width
+        out[1] = ai.ship_exploding
+        out[2] = ai.stats.ships_left / max(settings.ship_limit, 1)
+        out[3] = min(ai.stats.level / 30, 1.0)
+        out[4] = fleet.origin_x / width
+        out[5] = fleet.origin_y / height
+        out[6] = settings.fleet_direction
+        out[7] = settings.alien_speed / settings.maximum_alien_speed
+        out[8] = fleet.bottom() / height
+        out[9] = ai.ufo is not None
+        out[10] = ai.ufo.x / width if ai.ufo is not None else 0.0
+        out[11] = len(ai.bullets) / settings.bullets_allowed
+
+        index = self.scalars
+        for row in fleet.cells:
+            for alien in row:
+                out[index] = alien is not None
+                index += 1
+
+        slots = out[index:index + 3 * self.bullet_slots]
+        slots[:] = 0.0
+        # The group's own dict is read directly, so no list is built unless there are too many to describe
+        bullets = ai.alienbullets.spritedict
+        if len(bullets) > self.bullet_slots:
+            bullets = heapq.nlargest(self.bullet_slots, bullets, key=lambda bullet: bullet.y)
+        ship_x = ai.ship.rect.centerx
+        ship_y = ai.ship.rect.top
+        for slot, bullet in enumerate(bullets):
+            slots[3 * slot] = 1.0
+            slots[3 * slot + 1] = (bullet.rect.centerx - ship_x) / width
+            slots[3 * slot + 2] = (ship_y - bullet.y) / height
+
+        return out
+
+    def drawframe(self):
+        """
+        Draw the playfield straight at the frame's size, and store it in the frame buffer as grayscale.
+
+        The full size screen is never drawn: sprites are drawn with copies of their images
+          scaled once, bullets as scaled rects. A bunker's image is scaled again each time
+          it is hit. The scoreboard is left out.
+        """
+        ai = self.ai
+        small = self.__small
+        scalex = self.__scalex
+        scaley = self.__scaley
+        scaledimage = self.__scaledimage
+        if self.__backdrop is None:
+            self.__backdrop = pygame.transform.smoothscale(ai.renderer.getbackdrop(), self.frame_size)
+        small.blit(self.__backdrop, (0, 0))
+
+        small.blit(scaledimage(ai.ship.image), (ai.ship.x * scalex, ai.ship.rect.y * scaley))
+        if ai.ufo is not None:
+            small.blit(scaledimage(ai.ufo.image), (ai.ufo.x * scalex, ai.ufo.rect.y * scaley))
+        for group in (ai.aliens, ai.explosions):
+            small.blits([(scaledimage(sprite.image), (sprite.rect.x * scalex, sprite.rect.y * scaley))
+                         for sprite in group.spritedict], False)
+        bunkers = {}
+        for bunker in ai.bunkers.spritedict:
+            hits, image = self.__bunkers.get(bunker, (None, None))
+            if hits != bunker.hits:
+                hits, image = bunker.hits, pygame.transform.smoothscale(bunker.image, self.__scaledsize(bunker.image))
+            bunkers[bunker] = (hits, image)
+            small.blit(image, (bunker.rect.x * scalex, bunker.rect.y * scaley))
+        # Only the bunkers still standing are kept
+        self.__bunkers = bunkers
+        for group in (ai.bullets, ai.alienbullets):
+            for bullet in group.spritedict:
+                rect = bullet.rect
+                small.fill(bullet.color, (rect.x * scalex, bullet.y * scaley,
+                                          max(rect.width * scalex, 1), max(rect.height * scaley, 1)))
+
+        # The mean of the channels, summed a channel at a time (numpy.mean over the channel axis is far slower)
+        pixels = pygame.surfarray.pixels3d(small)
+        total = self.__sum
+        numpy.add(pixels[..., 0], pixels[..., 1], out=total, dtype=numpy.uint16)
+        total += pixels[..., 2]
+        del pixels
+        # surfarray is indexed [x, y], the frame [y, x]
+        numpy.floor_divide(total.T, 3, out=self.frame, casting='unsafe')
+
+    def __scaledimage(self, image):
+        scaled = self.__scaled.get(image)
+        if scaled is None:
+            scaled = pygame.transform.smoothscale(image, self.__scaledsize(image))
+            self.__scaled[image] = scaled
+        return scaled
+
+    def __scaledsize(self, image):
+        width, height = image.get_size()
+        return max(round(width * self.__scalex), 1), max(round(height * self.__scaley), 1)
+
+
+class VectorEnv:
+    """
+    N independent games stepped together, with batched NumPy observations and rewards.
+
+    Games that end are reset straight away; their final info is kept in infos[i]
+      under 'final_score' and 'final_level', and dones[i] is True for that step.
+    """
+
+    def __init__(self, count, seed=0, **options):
+        """Create 'count' games; 'options' are passed to each AlienInvasionEnv."""
+        self.count = count
+        first = AlienInvasionEnv(seed=seed, **options)
+        # Every game has the same observation size, so the first one sizes the batch
+        self.observations = numpy.zeros((count, first.size), numpy.float32)
+        self.rewards = numpy.zeros(count, numpy.float32)
+        self.dones = numpy.zeros(count, bool)
+
+        frame = options.get('frame')
+        self.frames = None if frame is None else numpy.zeros((count, frame[1], frame[0]), numpy.uint8)
+
+        first.observation = self.observations[0]
+        if self.frames is not None:
+            first.frame = self.frames[0]
+        self.envs = [first]
+        for index in range(1, count):
+            env = AlienInvasionEnv(seed=seed + index, observation=self.observations[index],
+                                   frame_buffer=None if self.frames is None else self.frames[index], **options)
+            self.envs.append(env)
+
+    def reset(self, seeds=None):
+        """Start every game; 'seeds' optionally gives one seed per game."""
+        for index, env in enumerate(self.envs):
+            env.reset(None if seeds is None else seeds[index])
+        self.rewards[:] = 0.0
+        self.dones[:] = False
+        return self.observations
+
+    def step(self, actions):
+        """Play one action in every game; return (observations, rewards, dones, infos)."""
+        infos = []
+        for index, env in enumerate(self.envs):
+            observation, reward, done, info = env.step(int(actions[index]))
+            if done:
+                info['final_score'] = info.pop('score')
+                info['final_level'] = info.pop('level')
+                env.reset()
+            self.rewards[index] = reward
+            self.dones[index] = done
+            infos.append(info)
+
+        return self.observations, self.rewards, self.dones, infos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the vectorized environment's speed with random actions")
+    parser.add_argument('--envs', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=1000, help="steps of every game")
+    parser.add_argument('--frame', type=int, nargs=2, metavar=('WIDTH', 'HEIGHT'), default=None,
+                        help="also produce downsampled grayscale frames of this size")
+    args = parser.parse_args()
+
+    env = VectorEnv(args.envs, frame=None if args.frame is None else tuple(args.frame))
+    env.reset()
+    generator = numpy.random.default_rng(0)
+    start = perf_counter()
+    for _ in range(args.steps):
+        env.step(generator.integers(0, AlienInvasionEnv.actions, args.envs))
+    seconds = perf_counter() - start
+
+    print("{} games x {} steps in {:.2f}s: {:.0f} steps/s, observations {}".format(
+        args.envs, args.steps, seconds, args.envs * args.steps / seconds, env.observations.shape))
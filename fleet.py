@@ -0,0 +1,150 @@
+class Fleet:
+    """
+    A class to move the alien formation as one rigid body.
+
+    Every member (alien or explosion) sits in a cell of a regular lattice, and its
+      rect is derived from the formation's origin only when something asks for it.
+      The formation's bounding box is kept up to date as members die, so edge, drop
+      and bottom checks cost the same however big the fleet is. A rect's position
+      also maps directly to the one or two cells it can overlap.
+    """
+
+    def __init__(self, columns, rows, origin_x, origin_y, column_spacing, row_spacing, cell_width, cell_height):
+        """Initialize an empty formation whose top left cell is at (origin_x, origin_y)."""
+        self.columns = columns
+        self.rows = rows
+        self.column_spacing = column_spacing
+        self.row_spacing = row_spacing
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+
+        # Position of the top left cell, and where it was last tick for drawing.
+        self.origin_x = float(origin_x)
+        self.origin_y = float(origin_y)
+        self.previous_origin_x = self.origin_x
+        # Bumped whenever the formation moves, so member rects know when they are stale
+        self.version = 0
+
+        # cells[row][column] holds the alien in that cell, or None
+        self.cells = [[None] * columns for _ in range(rows)]
+
+        # Members (aliens and explosions) per column and aliens per row, for the bounding box
+        self.column_members = [0] * columns
+        self.row_aliens = [0] * rows
+        self.first_column = columns
+        self.last_column = -1
+        self.last_row = -1
+
+        # Row of the front-most (lowest) alien in each column, or -1 for an empty column
+        self.column_front = [-1] * columns
+
+    def add(self, alien, column, row):
+        """Place an alien in a cell."""
+        self.__join(alien, column, row)
+        self.cells[row][column] = alien
+        self.row_aliens[row] += 1
+        self.last_row = max(self.last_row, row)
+        self.column_front[column] = max(self.column_front[column], row)
+
+    def addexplosion(self, explosion, column, row):
+        """Place an explosion in a cell; it keeps the column occupied until it finishes."""
+        self.__join(explosion, column, row)
+
+    def __join(self, member, column, row):
+        member.fleet = self
+        member.column = column
+        member.row = row
+        member.rectversion = -1
+        self.column_members[column] += 1
+        self.first_column = min(self.first_column, column)
+        self.last_column = max(self.last_column, column)
+
+    def remove(self, member):
+        """Kill a member, clear its cell and shrink the bounding box if needed."""
+        if member.fleet is not self:
+            member.kill()
+            return
+        member.fleet = None
+
+        column, row = member.column, member.row
+        if self.cells[row][column] is member:
+            self.cells[row][column] = None
+            self.row_aliens[row] -= 1
+            while self.last_row >= 0 and self.row_aliens[self.last_row] == 0:
+                self.last_row -= 1
+
+            # The next alien up the column, if any, becomes its front
+            if self.column_front[column] == row:
+                front = row - 1
+                while front >= 0 and self.cells[front][column] is None:
+                    front -= 1
+                self.column_front[column] = front
+
+        self.column_members[column] -= 1
+        while self.first_column <= self.last_column and self.column_members[self.first_column] == 0:
+            self.first_column += 1
+        while self.last_column >= self.first_column and self.column_members[self.last_column] == 0:
+            self.last_column -= 1
+
+        member.kill()
+
+    def frontaliens(self):
+        """Return the front-most alien of every column that still has one."""
+        return [self.cells[row][column] for column, row in enumerate(self.column_front) if row >= 0]
+
+    def shift(self, dx):
+        """Move the formation sideways."""
+        self.previous_origin_x = self.origin_x
+        self.origin_x += dx
+        self.version += 1
+
+    def drop(self, dy):
+        """Move the formation down."""
+        self.origin_y += dy
+        self.version += 1
+
+    def memberrect(self, member):
+        """Return a member's rect, bringing it up to date with the formation first."""
+        if member.rectversion != self.version:
+            member.rectversion = self.version
+            member.cellrect.x = int(self.origin_x + self.column_spacing * member.column)
+            member.cellrect.y = int(self.origin_y + self.row_spacing * member.row)
+        return member.cellrect
+
+    def memberx(self, member, alpha=1.0):
+        """Return a member's horizontal position 'alpha' of the way through the last tick."""
+        origin_x = self.previous_origin_x + (self.origin_x - self.previous_origin_x) * alpha
+        return origin_x + self.column_spacing * member.column
+
+    def left(self):
+        return int(self.origin_x + self.column_spacing * self.first_column)
+
+    def right(self):
+        return int(self.origin_x + self.column_spacing * self.last_column) + self.cell_width
+
+    def bottom(self):
+        return int(self.origin_y + self.row_spacing * self.last_row) + self.cell_height
+
+    def check_edges(self, screen_width):
+        """Return True if any member is at an edge of the screen."""
+        if self.last_column < self.first_column:
+            return False
+        return self.right() >= screen_width or self.left() <= 0
+
+    def collide(self, rect):
+        """Return a list of the aliens whose rects overlap 'rect'."""
+        # Widen by a pixel either side: member rects are truncated to whole pixels
+        first_column = max(int((rect.left - 1 - self.origin_x) // self.column_spacing), 0)
+        last_column = min(int((rect.right + 1 - self.origin_x) // self.column_spacing), self.columns - 1)
+        first_row = max(int((rect.top - 1 - self.origin_y) // self.row_spacing), 0)
+        last_row = min(int((rect.bottom + 1 - self.origin_y) // self.row_spacing), self.rows - 1)
+
+        hits = []
+        for row in range(first_row, last_row + 1):
+            cells = self.cells[row]
+            for column in range(first_column, last_column + 1):
+                alien = cells[column]
+                if alien is not None and self.memberrect(alien).colliderect(rect):
+                    hits.append(alien)
+
+        return hits
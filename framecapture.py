@@ -0,0 +1,137 @@
+import os
+import sys
+import queue
+import struct
+import threading
+import zlib
+import pygame
+
+
+class FrameCapture:
+    """
+    A class to record presented frames to disk without slowing the game down.
+
+    The main loop only copies (or scales) the screen into a bounded queue; a writer
+      thread encodes and writes the frames. When the writer falls behind and the
+      queue is full, frames are dropped and counted rather than waited for.
+
+    Formats:
+      'png'   a numbered PNG sequence in the directory 'path'
+      'raw'   packed RGB24 frames in one file, for e.g.
+                ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r 60 -i path out.mp4
+      'zlib'  one file of zlib-compressed RGB24 frames; see readframes()
+    """
+
+    formats = ['png', 'raw', 'zlib']
+    # magic, width, height
+    header = struct.Struct('<4sHH')
+    magic = b'AICF'
+
+    def __init__(self, ai_game, path, fmt=None, every=None, resolution=None, queue_size=None):
+        """Prepare to capture to 'path'; arguments left as None come from Settings."""
+        settings = ai_game.settings
+        self.path = path
+        self.format = fmt or settings.capture_format
+        if self.format not in self.formats:
+            raise ValueError("unknown capture format: " + self.format)
+        self.every = every or settings.capture_every
+        self.frame_cap = settings.frame_cap or 60
+        self.resolution = resolution or settings.capture_resolution or ai_game.screen.get_size()
+        self.queue = queue.Queue(queue_size or settings.capture_queue_size)
+
+        self.active = False
+        self.frames = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.__thread = None
+
+    def start(self):
+        """Start (or resume) capturing."""
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__write, name='FrameCapture', daemon=True)
+            self.__thread.start()
+        self.active = True
+
+    def pause(self):
+        self.active = False
+
+    def toggle(self):
+        if self.active:
+            self.pause()
+        else:
+            self.start()
+
+    def capture(self, screen):
+        """Queue a copy of the screen, if this frame is due; never waits for the writer."""
+        if not self.active:
+            return
+        self.frames += 1
+        if (self.frames - 1) % self.every:
+            return
+
+        if self.queue.full():
+            self.dropped += 1
+            return
+        if screen.get_size() == tuple(self.resolution):
+            frame = screen.copy()
+        else:
+            frame = pygame.transform.scale(screen, self.resolution)
+        self.queue.put_nowait(frame)
+        self.captured += 1
+
+    def close(self):
+        """Stop capturing, wait for the queued frames to be written and report."""
+        self.active = False
+        if self.__thread is None:
+            return
+        self.queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+
+        print("Captured {} frames to {} ({} dropped)".format(self.written, self.path, self.dropped), file=sys.stderr)
+        if self.format == 'raw':
+            print("Encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {}x{} -r {} -i {} capture.mp4".format(
+                self.resolution[0], self.resolution[1], max(self.frame_cap // self.every, 1), self.path), file=sys.stderr)
+
+    def __write(self):
+        """Writer thread: encode frames until the None sentinel arrives."""
+        file = None
+        if self.format == 'png':
+            os.makedirs(self.path, exist_ok=True)
+        else:
+            file = open(self.path, 'wb')
+            if self.format == 'zlib':
+                file.write(self.header.pack(self.magic, self.resolution[0], self.resolution[1]))
+
+        try:
+            while True:
+                frame = self.queue.get()
+                if frame is None:
+                    break
+                if self.format == 'png':
+                    pygame.image.save(frame, os.path.join(self.path, "frame{:06d}.png".format(self.written)))
+                elif self.format == 'raw':
+                    file.write(pygame.image.tobytes(frame, 'RGB'))
+                else:
+                    data = zlib.compress(pygame.image.tobytes(frame, 'RGB'), 1)
+                    file.write(struct.pack('<I', len(data)))
+                    file.write(data)
+                self.written += 1
+        finally:
+            if file is not None:
+                file.close()
+
+    @classmethod
+    def readframes(cls, path):
+        """Yield the frames of a 'zlib' capture as surfaces."""
+        with open(path, 'rb') as file:
+            magic, width, height = cls.header.unpack(file.read(cls.header.size))
+            if magic != cls.magic:
+                raise ValueError("{} is not a zlib frame capture".format(path))
+            while True:
+                length = file.read(4)
+                if not length:
+                    break
+                data = zlib.decompress(file.read(struct.unpack('<I', length)[0]))
+                yield pygame.image.frombytes(data, (width, height), 'RGB')
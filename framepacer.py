@@ -0,0 +1,36 @@
+import asyncio
+from time import perf_counter
+
+
+class FramePacer:
+    """
+    A class to hold a frame cap without blocking an asyncio event loop.
+
+    Instead of sleeping the thread like pygame.time.Clock.tick(), tick() awaits for the rest
+      of the frame budget, so other tasks on the loop run in the time between frames.
+    """
+
+    def __init__(self, frame_cap=0):
+        """Initialize the pacer; a frame_cap of 0 only yields to the loop once per frame."""
+        self.frame_cap = frame_cap
+        self.__last = None
+        self.__deadline = None
+
+    async def tick(self):
+        """Wait until the next frame is due and return the seconds since the previous frame."""
+        now = perf_counter()
+        if self.__last is None:
+            self.__last = now
+            self.__deadline = now
+
+        if self.frame_cap:
+            # Aim for evenly spaced deadlines, but don't try to catch up after a long frame
+            self.__deadline = max(self.__deadline + 1 / self.frame_cap, now)
+            await asyncio.sleep(self.__deadline - now)
+        else:
+            await asyncio.sleep(0)
+
+        now = perf_counter()
+        frame_time = now - self.__last
+        self.__last = now
+        return frame_time
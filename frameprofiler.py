@@ -0,0 +1,211 @@
+import atexit
+import csv
+from collections import deque
+from time import perf_counter
+import pygame
+from textcache import TextCache
+
+
+class FrameProfiler:
+    """
+    A class to time each phase of the game's frames and show the results on screen.
+
+    Enabling the profiler replaces the timed methods with timing wrappers on their instances;
+      disabling it deletes the wrappers again, so a disabled profiler adds no cost at all.
+    """
+
+    # (phase name, object attribute on the game or None for the game itself, method name)
+    phases = [
+        ('events', None, '_check_events'),
+        ('ship', 'ship', 'update'),
+        ('bullets', None, '_update_bullets'),
+        ('bullet_collisions', None, '_check_bullet_alien_collisions'),
+        ('alien_bullet_collisions', None, '_check_alienbullet_collisions'),
+        ('aliens', None, '_update_aliens'),
+        ('draw', None, '_update_screen'),
+        ('menu', None, '_draw_main_menu'),
+        ('present', 'renderer', 'present'),
+    ]
+    # Methods that run exactly one frame
+    frame_methods = ['_run_frame', '_simulate_frame']
+
+    def __init__(self, ai_game):
+        """Initialize an (inactive) profiler for a game."""
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.enabled = False
+        self.show_overlay = True
+        self.__wrapped = []
+        self.__exporting = False
+
+        # Seconds spent in each phase during the current frame
+        self.current = dict.fromkeys([phase[0] for phase in self.phases], 0.0)
+        # Rows of (frame time, phase times...) for the overlay and for export
+        self.window = deque(maxlen=self.settings.profile_window)
+        self.samples = deque(maxlen=self.settings.profile_max_samples)
+
+        # Overlay text is refreshed every few frames rather than rendered every frame
+        self.overlay_image = None
+        self.__frames_since_overlay = 0
+
+    def enable(self, overlay=True, export=True):
+        """
+        Install the timing wrappers.
+
+        'overlay' draws the timings on screen; 'export' writes the samples to CSV on exit.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.show_overlay = overlay
+
+        for phase, attribute, method in self.phases:
+            target = self.ai_game if attribute is None else getattr(self.ai_game, attribute)
+            if phase == 'present':
+                self.__wrap(target, method, self.__timedpresent(phase, getattr(target, method)))
+            else:
+                self.__wrap(target, method, self.__timed(phase, getattr(target, method)))
+        for method in self.frame_methods:
+            self.__wrap(self.ai_game, method, self.__timedframe(getattr(self.ai_game, method)))
+
+        if export and not self.__exporting:
+            self.__exporting = True
+            atexit.register(self.export)
+
+    def disable(self):
+        """Remove the timing wrappers, restoring the original methods."""
+        if not self.enabled:
+            return
+        self.enabled = False
+
+        for target, method in self.__wrapped:
+            del target.__dict__[method]
+        self.__wrapped = []
+        self.overlay_image = None
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def reset(self):
+        """Forget every recorded frame."""
+        self.window.clear()
+        self.samples.clear()
+
+    def __wrap(self, target, method, wrapper):
+        setattr(target, method, wrapper)
+        self.__wrapped.append((target, method))
+
+    def __timed(self, phase, function):
+        current = self.current
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current[phase] += perf_counter() - start
+
+        return timed
+
+    def __timedpresent(self, phase, function):
+        timed = self.__timed(phase, function)
+
+        def present(*args, **kwargs):
+            # Draw the overlay on top of the finished frame, just before it is shown
+            if self.show_overlay:
+                self.__drawoverlay()
+                # The overlay changes, so no frame is static while it is shown
+                kwargs.pop('static', None)
+            return timed(*args, **kwargs)
+
+        return present
+
+    def __timedframe(self, function):
+        current = self.current
+
+        def frame(*args, **kwargs):
+            for phase in current:
+                current[phase] = 0.0
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                row = (perf_counter() - start,) + tuple(current.values())
+                self.window.append(row)
+                self.samples.append(row)
+
+        return frame
+
+    def percentiles(self, column=0, rows=None):
+        """Return the (p50, p95, p99) in seconds of one column of the rolling window (or of 'rows')."""
+        values = sorted(row[column] for row in (self.window if rows is None else rows))
+        if not values:
+            return 0.0, 0.0, 0.0
+        last = len(values) - 1
+        return values[int(last * 0.50)], values[int(last * 0.95)], values[int(last * 0.99)]
+
+    def summary(self):
+        """Return the mean, p50, p95 and p99 in milliseconds of the frame and each phase, over every sample."""
+        summary = {}
+        for column, name in enumerate(['frame'] + list(self.current)):
+            p50, p95, p99 = self.percentiles(column, self.samples)
+            mean = sum(row[column] for row in self.samples) / len(self.samples) if self.samples else 0.0
+            summary[name] = {
+                'mean': round(mean * 1000, 4),
+                'p50': round(p50 * 1000, 4),
+                'p95': round(p95 * 1000, 4),
+                'p99': round(p99 * 1000, 4),
+            }
+        return summary
+
+    def __prepoverlay(self):
+        font = TextCache.getinstance().getfont(22)
+        names = ['frame'] + list(self.current)
+        lines = ["{:<24}{:>7}{:>7}{:>7}".format('ms', 'p50', 'p95', 'p99')]
+        for column, name in enumerate(names):
+            p50, p95, p99 = self.percentiles(column)
+            lines.append("{:<24}{:7.2f}{:7.2f}{:7.2f}".format(name, p50 * 1000, p95 * 1000, p99 * 1000))
+
+        line_height = font.get_linesize()
+        graph_height = 60
+        width = 340
+        self.overlay_image = pygame.Surface((width, line_height * len(lines) + graph_height + 10))
+        self.overlay_image.fill((0, 0, 0))
+        for index, line in enumerate(lines):
+            self.overlay_image.blit(font.render(line, True, (51, 255, 51)), (5, index * line_height))
+
+        # Frame time graph, newest on the right; the white line is 1/60 s
+        top = line_height * len(lines) + 5
+        scale = graph_height / (2 / 60)
+        frames = list(self.window)[-width:]
+        for x, row in enumerate(frames, width - len(frames)):
+            height = min(int(row[0] * scale), graph_height)
+            color = (255, 175, 15) if row[0] > 1 / 60 else (51, 255, 51)
+            pygame.draw.line(self.overlay_image, color, (x, top + graph_height), (x, top + graph_height - height))
+        target = top + graph_height - int(scale / 60)
+        pygame.draw.line(self.overlay_image, (255, 255, 255), (0, target), (width, target))
+
+    def __drawoverlay(self):
+        self.__frames_since_overlay += 1
+        if self.overlay_image is None or self.__frames_since_overlay >= self.settings.profile_overlay_interval:
+            self.__frames_since_overlay = 0
+            self.__prepoverlay()
+
+        renderer = self.ai_game.renderer
+        renderer.add(renderer.screen.blit(self.overlay_image, (10, 70)))
+
+    def export(self, path=None):
+        """Write every recorded frame to a CSV file, one row per frame with times in milliseconds."""
+        if not self.samples:
+            return
+        if path is None:
+            path = self.settings.profile_csv
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame'] + list(self.current))
+            for row in self.samples:
+                writer.writerow(["{:.4f}".format(value * 1000) for value in row])
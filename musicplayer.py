@@ -0,0 +1,205 @@
+import os
+import hashlib
+import threading
+from time import perf_counter
+import pygame
+
+
+class MusicCache:
+    """
+    A class to decode music files to raw PCM once, and keep the result on disk.
+
+    Decoded audio is stored under 'directory', keyed by the source file's path, size
+      and modification time and by the mixer's format, so a changed file or mixer
+      setup is decoded again.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.decoded = 0
+        self.loaded = 0
+
+    def getpcm(self, path):
+        """Return the decoded samples of 'path' in the mixer's current format."""
+        source = os.stat(path)
+        key = repr((os.path.abspath(path), source.st_size, source.st_mtime_ns, pygame.mixer.get_init()))
+        cachepath = os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.pcm')
+
+        if os.path.isfile(cachepath):
+            self.loaded += 1
+            with open(cachepath, 'rb') as file:
+                return file.read()
+
+        self.decoded += 1
+        pcm = pygame.mixer.Sound(path).get_raw()
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so an interrupted write never leaves a truncated cache file
+        with open(cachepath + '.tmp', 'wb') as file:
+            file.write(pcm)
+        os.replace(cachepath + '.tmp', cachepath)
+        return pcm
+
+
+class MusicTrack:
+    """One decoded music file, cut into short Sounds that are queued back to back."""
+
+    def __init__(self, pcm, chunk_seconds):
+        frequency, size, channels = pygame.mixer.get_init()
+        self.frame_bytes = abs(size) // 8 * channels
+        self.frequency = frequency
+        self.chunk_bytes = int(chunk_seconds * frequency) * self.frame_bytes
+        self.chunk_seconds = self.chunk_bytes / self.frame_bytes / frequency
+        self.chunks = [pygame.mixer.Sound(buffer=pcm[start:start + self.chunk_bytes])
+                       for start in range(0, len(pcm), self.chunk_bytes)]
+        self.duration = len(pcm) / self.frame_bytes / frequency
+
+    def partialchunk(self, position):
+        """Return (chunk index, Sound) for the rest of the chunk that contains 'position' seconds."""
+        index = min(int(position / self.chunk_seconds), len(self.chunks) - 1)
+        offset = int(position * self.frequency) * self.frame_bytes - index * self.chunk_bytes
+        # Only this one chunk is copied, so starting mid-song costs well under a millisecond
+        return index, pygame.mixer.Sound(buffer=self.chunks[index].get_raw()[max(offset, 0):])
+
+
+class MusicPlayer:
+    """
+    A class to play looping music at several tempos, switching between them seamlessly.
+
+    Each tempo's file is decoded into memory up front (through a MusicCache), so a
+      switch never touches the disk. Playback queues one short chunk ahead on a pair of
+      reserved channels; a switch starts the new tempo at the same point in the song
+      on the other channel and crossfades to it. update() must be called every frame
+      to keep the next chunk queued.
+
+    With 'background', the files are decoded on a thread so the caller doesn't wait;
+      music asked for before they are ready starts from update() once they are.
+    """
+
+    def __init__(self, paths, speeds, cache, channels, chunk_seconds=1.0, crossfade_ms=250, volume=0.1,
+                 background=False):
+        """Decode the files; 'speeds' are their tempos relative to the first, 'channels' two reserved Channels."""
+        self.speeds = speeds
+        self.tracks = None
+        # Seconds spent decoding (or reading the cache), once done
+        self.load_seconds = None
+        if background:
+            threading.Thread(target=self.__load, args=(paths, cache, chunk_seconds), name='MusicPlayer',
+                             daemon=True).start()
+        else:
+            self.__load(paths, cache, chunk_seconds)
+        self.channels = channels
+        self.crossfade_ms = crossfade_ms
+        self.volume = volume
+
+        self.playing = False
+        self.track = 0
+        self.__channel = 0
+        self.__chunk = 0
+        # When the current chunk's start would have played, for the song position
+        self.__chunkstart = 0.0
+        # The channel fading out after a switch, and when its fade began
+        self.__fading = None
+        self.__fadestart = 0.0
+        # The (track, position) asked for before the tracks were ready
+        self.__pending = None
+        # Times the queue ran dry and the music had to be restarted
+        self.starved = 0
+
+    def play(self, track, position=0.0, fade=False):
+        """
+        Start 'track' at 'position' seconds into the song, measured at the first track's tempo.
+
+        With 'fade', the track playing now fades out as the new one fades in.
+        """
+        if self.tracks is None:
+            self.__pending = (track, position)
+            self.track = track
+            return
+
+        new = self.tracks[track]
+        filepos = (position / self.speeds[track]) % new.duration
+        index, sound = new.partialchunk(filepos)
+
+        fade = fade and self.playing
+        old = self.channels[self.__channel]
+        if fade:
+            # Channel.fadeout() would start the queued chunk once the fade ended,
+            #   so the old channel is faded by hand in update() and then stopped
+            self.__channel = 1 - self.__channel
+            self.__fading = old
+            self.__fadestart = perf_counter()
+        else:
+            old.stop()
+
+        channel = self.channels[self.__channel]
+        channel.stop()
+        channel.set_volume(self.volume)
+        channel.play(sound, fade_ms=self.crossfade_ms if fade else 0)
+        self.track = track
+        self.__chunk = index
+        self.__chunkstart = perf_counter() - (filepos - index * new.chunk_seconds)
+        self.__queuenext()
+        self.playing = True
+
+    def switch(self, track):
+        """Crossfade to another tempo at the equivalent point in the song."""
+        self.play(track, self.position(), fade=True)
+
+    def stop(self):
+        self.__pending = None
+        for channel in self.channels:
+            channel.stop()
+        self.__fading = None
+        self.playing = False
+
+    def position(self):
+        """Return how far into the song playback is, in seconds at the first track's tempo."""
+        if not self.playing:
+            return 0.0
+        track = self.tracks[self.track]
+        filepos = self.__chunk * track.chunk_seconds + perf_counter() - self.__chunkstart
+        return filepos * self.speeds[self.track]
+
+    def update(self):
+        """Queue the next chunk once the queued one has started playing, and advance any fade out."""
+        if self.__fading is not None:
+            faded = (perf_counter() - self.__fadestart) * 1000 / self.crossfade_ms
+            if faded >= 1:
+                self.__fading.stop()
+                self.__fading = None
+            else:
+                self.__fading.set_volume(self.volume * (1 - faded))
+
+        if self.__pending is not None and self.tracks is not None:
+            track, position = self.__pending
+            self.__pending = None
+            self.play(track, position)
+
+        if not self.playing:
+            return
+        channel = self.channels[self.__channel]
+        if not channel.get_busy():
+            # Nothing was queued in time (the game stalled for a whole chunk); pick up where the song should be
+            self.starved += 1
+            self.play(self.track, self.position())
+        elif channel.get_queue() is None:
+            track = self.tracks[self.track]
+            self.__chunk = (self.__chunk + 1) % len(track.chunks)
+            self.__chunkstart = perf_counter()
+            self.__queuenext()
+
+    def __load(self, paths, cache, chunk_seconds):
+        started = perf_counter()
+        try:
+            tracks = [MusicTrack(cache.getpcm(path), chunk_seconds) for path in paths]
+        except (pygame.error, TypeError):
+            # The mixer was shut down (the game quit) before the music finished loading;
+            #   get_init() then returns None, or decoding raises
+            return
+        self.load_seconds = perf_counter() - started
+        # Published last, so the tracks are complete whenever another thread sees them
+        self.tracks = tracks
+
+    def __queuenext(self):
+        track = self.tracks[self.track]
+        self.channels[self.__channel].queue(track.chunks[(self.__chunk + 1) % len(track.chunks)])
@@ -0,0 +1,104 @@
+import pygame
+from bullet import Bullet
+from alienbullet import AlienBullet
+
+
+class ProjectileGroup(pygame.sprite.Group):
+    """
+    A sprite group that also keeps its sprites in a list, in the order they were added.
+
+    The list lets ProjectileManager move and cull the projectiles in a single pass,
+      compacting it in place, instead of copying the group to remove from it. Sprites
+      removed from the group some other way (kill(), empty()) stay in the list until
+      the next pass drops them.
+    """
+
+    def __init__(self, *sprites):
+        self.order = []
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        if sprite not in self.spritedict:
+            self.order.append(sprite)
+        super().add_internal(sprite, layer)
+
+
+class ProjectileManager:
+    """
+    A class to own the player's and the aliens' bullets, from firing to culling.
+
+    Each kind has a cap on how many may be in flight. The player's is the game's rule
+      (bullets_allowed); the aliens' (alien_bullets_allowed) is a safety limit, and the
+      shots it refuses are counted. Bullets are dropped as soon as they leave the
+      screen. Live and peak counts are kept so a leak shows up in stats().
+    """
+
+    def __init__(self, ai_game):
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.bullets = ProjectileGroup()
+        self.alienbullets = ProjectileGroup()
+
+        self.peak_bullets = 0
+        self.peak_alienbullets = 0
+        self.culled = 0
+        self.refused = 0
+
+    def fire(self):
+        """Fire from the ship, unless bullets_allowed are in flight; return the new bullet or None."""
+        if len(self.bullets) >= self.settings.bullets_allowed:
+            return None
+        bullet = Bullet(self.ai_game)
+        self.bullets.add(bullet)
+        return bullet
+
+    def firealien(self, alien):
+        """Fire from an alien, unless alien_bullets_allowed are in flight; return the new bullet or None."""
+        if len(self.alienbullets) >= self.settings.alien_bullets_allowed:
+            self.refused += 1
+            return None
+        bullet = AlienBullet(self.ai_game, alien)
+        self.alienbullets.add(bullet)
+        return bullet
+
+    def update(self, dt):
+        """Move every bullet and drop the ones that have left the screen."""
+        self.peak_bullets = max(self.peak_bullets, len(self.bullets))
+        self.peak_alienbullets = max(self.peak_alienbullets, len(self.alienbullets))
+
+        # Player bullets leave through the top, alien bullets through the bottom
+        self.__updategroup(self.bullets, dt, lambda rect: rect.bottom <= 0)
+        height = self.settings.screen_height
+        self.__updategroup(self.alienbullets, dt, lambda rect: rect.bottom >= height)
+
+    def __updategroup(self, group, dt, gone):
+        order = group.order
+        live = group.spritedict
+        kept = 0
+        for bullet in order:
+            if bullet not in live:
+                continue
+            bullet.update(dt)
+            if gone(bullet.rect):
+                group.remove(bullet)
+                self.culled += 1
+                continue
+            order[kept] = bullet
+            kept += 1
+        del order[kept:]
+
+    def clear(self):
+        self.bullets.empty()
+        self.alienbullets.empty()
+        self.bullets.order.clear()
+        self.alienbullets.order.clear()
+
+    def stats(self):
+        return {
+            'bullets': len(self.bullets),
+            'alienbullets': len(self.alienbullets),
+            'peak_bullets': self.peak_bullets,
+            'peak_alienbullets': self.peak_alienbullets,
+            'culled': self.culled,
+            'refused': self.refused,
+        }
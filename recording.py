@@ -0,0 +1,94 @@
+import atexit
+import struct
+import zlib
+
+
+class Recording:
+    """
+    A recorded game: its random seed, its screen, and the player's input on every tick.
+
+    The simulation only depends on the seed, the screen size, the tick rate and these
+      inputs, so replaying them reproduces the game exactly. The digest of the final
+      game state is stored too, to check that a replay ended up in the same place.
+    """
+
+    magic = b'AIRP'
+    # 2: off-screen alien bullets are culled, which changes the final state digest
+    # 3: the game's timers are paused while the ship explodes
+    version = 3
+    # magic, version, seed, tick rate, screen width, screen height, ticks, final state digest
+    header = struct.Struct('<4sBQHHHI32s')
+
+    # Bits of each tick's input byte
+    LEFT = 1
+    RIGHT = 2
+    FIRE = 4
+
+    def __init__(self, seed, tick_rate, resolution, inputs=None, digest=b''):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.resolution = tuple(resolution)
+        self.inputs = bytearray() if inputs is None else bytearray(inputs)
+        self.digest = digest
+
+    def record(self, left, right, fire):
+        """Append one tick's input."""
+        self.inputs.append((self.LEFT if left else 0) | (self.RIGHT if right else 0) | (self.FIRE if fire else 0))
+
+    def ticks(self):
+        """Yield (left, right, fire) for every recorded tick."""
+        for bits in self.inputs:
+            yield bool(bits & self.LEFT), bool(bits & self.RIGHT), bool(bits & self.FIRE)
+
+    def save(self, path):
+        """Write the recording; held inputs repeat for many ticks, so they compress very well."""
+        with open(path, 'wb') as file:
+            file.write(self.header.pack(self.magic, self.version, self.seed, self.tick_rate,
+                                        self.resolution[0], self.resolution[1], len(self.inputs),
+                                        self.digest.ljust(32, b'\0')))
+            file.write(zlib.compress(bytes(self.inputs), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        magic, version, seed, tick_rate, width, height, ticks, digest = cls.header.unpack_from(data)
+        if magic != cls.magic or version != cls.version:
+            raise ValueError("{} is not a version {} Alien Invasion recording".format(path, cls.version))
+        inputs = zlib.decompress(data[cls.header.size:])
+        if len(inputs) != ticks:
+            raise ValueError("{} is truncated: {} of {} ticks".format(path, len(inputs), ticks))
+
+        return cls(seed, tick_rate, (width, height), inputs, digest)
+
+
+class Recorder:
+    """
+    A class to record each game the player starts to a file.
+
+    The file is written when the game ends, or when the program exits mid-game, and
+      always holds the most recent game.
+    """
+
+    def __init__(self, ai_game, path):
+        self.ai_game = ai_game
+        self.path = path
+        self.recording = None
+        atexit.register(self.finish)
+
+    def start(self, seed):
+        """Begin recording a new game."""
+        self.recording = Recording(seed, self.ai_game.settings.tick_rate, self.ai_game.screen.get_size())
+
+    def record(self, left, right, fire):
+        if self.recording is not None:
+            self.recording.record(left, right, fire)
+
+    def finish(self):
+        """Stamp the final state on the current recording and save it."""
+        if self.recording is None:
+            return
+        self.recording.digest = self.ai_game.state_digest()
+        self.recording.save(self.path)
+        self.recording = None
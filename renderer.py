@@ -0,0 +1,184 @@
+import pygame
+
+
+class Renderer:
+    """
+    A class to redraw and present only the parts of the screen that changed.
+
+    In 'dirty' mode each frame restores the background under last frame's drawings,
+      collects the rects of everything drawn this frame and presents just those areas
+      with pygame.display.update(rects). When the changed area grows past
+      Settings.dirty_threshold of the screen, it falls back to a full flip.
+      In 'full' mode every frame redraws and flips the whole screen.
+
+    When the game renders at a fixed logical resolution and scales in software
+      (see setoutput()), every presented frame is smoothscaled onto the display in one
+      pass instead. Frames that are the same every time (the menus) are scaled once
+      per output size and kept.
+    """
+
+    # Scaled static frames kept before the oldest are dropped
+    static_cache_size = 8
+
+    def __init__(self, ai_game):
+        """Initialize the renderer for the game's screen."""
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.present_to_display = not ai_game.headless
+        # A FrameCapture to hand each presented frame to, if recording
+        self.capture = None
+        # The display frames are scaled onto, if not the screen itself
+        self.output = None
+        self.output_rect = None
+        self.scaled_frame = None
+        # (static key, output size) -> scaled frame
+        self.scaled_static = {}
+
+        # Background color and image composed once, restored from in pieces
+        self.backdrop = None
+        self.previous_rects = []
+        self.rects = []
+        self.full_redraw = True
+
+        # Measurements of the last frame, and totals over all frames
+        self.frame_bytes = 0
+        self.frame_rects = 0
+        self.frames = 0
+        self.full_frames = 0
+        self.total_bytes = 0
+
+    def setoutput(self, display):
+        """Scale every presented frame onto 'display', as large as fits with the screen's aspect ratio."""
+        width, height = self.screen.get_size()
+        scale = min(display.get_width() / width, display.get_height() / height)
+        self.output = display
+        self.output_rect = pygame.Rect(0, 0, int(width * scale), int(height * scale))
+        self.output_rect.center = display.get_rect().center
+        # Scaled into the same surface every frame, so presenting allocates nothing
+        self.scaled_frame = pygame.Surface(self.output_rect.size, 0, display)
+        # The bars around the picture are never drawn over
+        display.fill(self.settings.bg_color)
+        pygame.display.flip()
+
+    def tological(self, position):
+        """Map a display position (e.g. the mouse's) to the screen's coordinates."""
+        if self.output is None:
+            return position
+        x = (position[0] - self.output_rect.x) * self.screen.get_width() // self.output_rect.width
+        y = (position[1] - self.output_rect.y) * self.screen.get_height() // self.output_rect.height
+        return x, y
+
+    def invalidate(self):
+        """Redraw and present the whole screen next frame (e.g. after a menu drew over it)."""
+        self.full_redraw = True
+
+    def getbackdrop(self):
+        """Return the background color and image composed at screen size."""
+        if self.backdrop is None or self.backdrop.get_size() != self.screen.get_size():
+            self.backdrop = pygame.Surface(self.screen.get_size(), 0, self.screen)
+            self.backdrop.fill(self.settings.bg_color)
+            self.backdrop.blit(self.settings.screenbackground, self.settings.screenbackgroundrect)
+            self.full_redraw = True
+
+        return self.backdrop
+
+    def begin_frame(self):
+        """Restore the background, either everywhere or only under last frame's drawings."""
+        self.getbackdrop()
+
+        self.rects = []
+        if self.settings.render_mode != 'dirty' or self.full_redraw:
+            self.screen.blit(self.backdrop, (0, 0))
+            self.full_redraw = True
+        else:
+            for rect in self.previous_rects:
+                self.screen.blit(self.backdrop, rect, rect)
+
+    def add(self, rect):
+        """Record a rect drawn this frame."""
+        self.rects.append(rect)
+
+    def extend(self, rects):
+        """Record several rects drawn this frame."""
+        self.rects.extend(rects)
+
+    def present(self, static=None):
+        """
+        Show this frame, and measure how many bytes of pixels it touched.
+
+        'static' is a key for a frame that always looks the same when it has that key,
+          so its scaled copy can be reused.
+        """
+        screen_rect = self.screen.get_rect()
+        bytes_per_pixel = self.screen.get_bytesize()
+        screen_area = screen_rect.width * screen_rect.height
+
+        dirty = self.previous_rects + self.rects
+        dirty_area = 0
+        for rect in dirty:
+            dirty_area += rect.width * rect.height
+
+        # What begin_frame() copied from the backdrop: the whole screen, or only last frame's rects
+        if self.full_redraw or self.settings.render_mode != 'dirty':
+            restored = screen_area
+        else:
+            restored = 0
+            for rect in self.previous_rects:
+                restored += rect.width * rect.height
+
+        full = self.full_redraw or self.settings.render_mode != 'dirty' or \
+            dirty_area > screen_area * self.settings.dirty_threshold
+
+        if self.output is not None:
+            # Scaling touches the whole frame whatever changed, so it is always presented whole
+            self.frame_bytes = (restored + screen_area) * bytes_per_pixel + \
+                self.output_rect.width * self.output_rect.height * self.output.get_bytesize()
+            self.frame_rects = 1
+            self.full_frames += 1
+            if self.present_to_display:
+                self.output.blit(self.scaleframe(static), self.output_rect)
+                pygame.display.update(self.output_rect)
+        elif full:
+            # The whole screen is presented, however much of it was restored
+            self.frame_bytes = (restored + screen_area) * bytes_per_pixel
+            self.frame_rects = 1
+            self.full_frames += 1
+            if self.present_to_display:
+                pygame.display.flip()
+        else:
+            # Old plus new rects are presented
+            self.frame_bytes = (restored + dirty_area) * bytes_per_pixel
+            self.frame_rects = len(dirty)
+            if self.present_to_display:
+                pygame.display.update(dirty)
+
+        self.frames += 1
+        self.total_bytes += self.frame_bytes
+        self.previous_rects = self.rects
+        self.rects = []
+        self.full_redraw = False
+
+        if self.capture is not None:
+            self.capture.capture(self.screen)
+
+    def scaleframe(self, static=None):
+        """Return the screen scaled to the output size, from the cache if it is a static frame already scaled."""
+        if static is None:
+            return pygame.transform.smoothscale(self.screen, self.output_rect.size, self.scaled_frame)
+
+        key = (static, self.output_rect.size)
+        frame = self.scaled_static.get(key)
+        if frame is None:
+            if len(self.scaled_static) >= self.static_cache_size:
+                del self.scaled_static[next(iter(self.scaled_static))]
+            frame = pygame.transform.smoothscale(self.screen, self.output_rect.size)
+            self.scaled_static[key] = frame
+        return frame
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'full_frames': self.full_frames,
+            'frame_bytes': self.frame_bytes,
+            'average_frame_bytes': self.total_bytes / self.frames if self.frames else 0,
+        }
@@ -0,0 +1,87 @@
+import heapq
+
+
+class ScheduledEvent:
+    """A handle to a callback waiting in a Scheduler."""
+
+    def __init__(self, time, callback, interval=None):
+        self.time = time
+        self.callback = callback
+        # Seconds between repeats, or None for a one-shot event
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop the event from firing (again)."""
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    A class to run callbacks at points in simulation time.
+
+    Time only moves when advance() is called, so everything scheduled here can be paused,
+      fast-forwarded or replayed deterministically along with the simulation. Events due
+      at the same time fire in the order they were scheduled.
+    """
+
+    def __init__(self):
+        """Initialize an empty schedule at time zero."""
+        self.time = 0.0
+        # Heap of (time, sequence number, event)
+        self.__events = []
+        self.__sequence = 0
+
+    def schedule(self, delay, callback, interval=None):
+        """Call 'callback' once after 'delay' seconds, then every 'interval' seconds if given."""
+        event = ScheduledEvent(self.time + delay, callback, interval)
+        self.__push(event)
+        return event
+
+    def every(self, interval, callback):
+        """Call 'callback' every 'interval' seconds, starting one interval from now."""
+        return self.schedule(interval, callback, interval)
+
+    def timeline(self, steps):
+        """
+        Schedule a sequence of (delay, callback) steps, each delay counted from the step before.
+
+        Returns the step events, so the whole sequence can be cancelled.
+        """
+        events = []
+        delay = 0.0
+        for step_delay, callback in steps:
+            delay += step_delay
+            events.append(self.schedule(delay, callback))
+        return events
+
+    def advance(self, dt):
+        """Move time forward by dt seconds, firing every event that comes due on the way."""
+        target = self.time + dt
+
+        while self.__events and self.__events[0][0] <= target:
+            time, sequence, event = heapq.heappop(self.__events)
+            if event.cancelled:
+                continue
+
+            # Callbacks see the time the event was due, and may schedule further events
+            self.time = time
+            if event.interval is not None:
+                event.time = time + event.interval
+                self.__push(event)
+            event.callback()
+
+        self.time = target
+
+    def clear(self):
+        """Drop every pending event."""
+        for time, sequence, event in self.__events:
+            event.cancelled = True
+        self.__events = []
+
+    def pending(self):
+        return sum(1 for time, sequence, event in self.__events if not event.cancelled)
+
+    def __push(self, event):
+        heapq.heappush(self.__events, (event.time, self.__sequence, event))
+        self.__sequence += 1
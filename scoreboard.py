@@ -1,6 +1,7 @@
+import pygame
 import pygame.font
-from pygame.sprite import Group
-from ship import Ship
+from assetmanager import AssetManager
+from textcache import TextCache
 
 
 class Scoreboard:
@@ -16,7 +17,8 @@ class Scoreboard:
         
         # Font settings for scoring information.
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font_size = 48
+        self.font = TextCache.getinstance().getfont(self.font_size)
 
         # Score
         self.score_image = None
@@ -25,7 +27,19 @@ class Scoreboard:
         self.high_score_rect = None
         self.level_image = None
         self.level_rect = None
-        self.ships = None
+        self.ship_image = None
+        self.ship_rects = []
+
+        # Values currently rendered, so unchanged values are not rendered again
+        self.__score = None
+        self.__high_score = None
+        self.__level = None
+        self.__ships_left = None
+
+        # Everything above composited into one surface, and the areas of it in use
+        self.hud_image = None
+        self.hud_rects = []
+        self.__hud_dirty = True
 
         # Prepare the initial score images.
         self.prep_score()
@@ -36,43 +50,67 @@ class Scoreboard:
     def prep_score(self):
         """Turn the score into a rendered image."""
         rounded_score = round(self.stats.score, -1)
+        if rounded_score == self.__score:
+            return
+        self.__score = rounded_score
+
         score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render(score_str, True, self.text_color, self.settings.bg_color)
+        self.score_image = TextCache.getinstance().rendernumber(score_str, self.font_size, self.text_color,
+                                                                self.settings.bg_color)
         
         # Display the score at the top right of the screen.
         self.score_rect = self.score_image.get_rect()
         self.score_rect.right = self.screen_rect.right - 20
         self.score_rect.top = 20
+        self.__hud_dirty = True
 
     def prep_high_score(self):
         """Turn the high score into a rendered image."""
         high_score = round(self.stats.high_score, -1)
+        if high_score == self.__high_score:
+            return
+        self.__high_score = high_score
+
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render(high_score_str, True, self.text_color, self.settings.bg_color)
+        self.high_score_image = TextCache.getinstance().rendernumber(high_score_str, self.font_size, self.text_color,
+                                                                     self.settings.bg_color)
             
         # Center the high score at the top of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
         self.high_score_rect.centerx = self.screen_rect.centerx
         self.high_score_rect.top = self.score_rect.top
+        self.__hud_dirty = True
 
     def prep_level(self):
         """Turn the level into a rendered image."""
+        if self.stats.level == self.__level:
+            return
+        self.__level = self.stats.level
+
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(level_str, True, self.text_color, self.settings.bg_color)
+        self.level_image = TextCache.getinstance().rendernumber(level_str, self.font_size, self.text_color,
+                                                                self.settings.bg_color)
     
         # Position the level below the score.
         self.level_rect = self.level_image.get_rect()
         self.level_rect.right = self.score_rect.right
         self.level_rect.top = self.score_rect.bottom + 10
+        self.__hud_dirty = True
 
     def prep_ships(self):
         """Show how many ships are left."""
-        self.ships = Group()
+        if self.stats.ships_left == self.__ships_left:
+            return
+        self.__ships_left = self.stats.ships_left
+
+        self.ship_image = AssetManager.getinstance().getimage('images/ship.png')
+        self.ship_rects = []
         for ship_number in range(self.stats.ships_left):
-            ship = Ship(self.ai_game)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
+            rect = self.ship_image.get_rect()
+            rect.x = 10 + ship_number * rect.width
+            rect.y = 10
+            self.ship_rects.append(rect)
+        self.__hud_dirty = True
 
     def check_high_score(self):
         """Check to see if there's a new high score."""
@@ -80,29 +118,53 @@ class Scoreboard:
             self.stats.high_score = self.stats.score
             self.prep_high_score()
 
+    def prep_hud(self):
+        """Composite the score, high score, level and ships into one surface."""
+        height = max(self.level_rect.bottom, self.high_score_rect.bottom, self.score_rect.bottom)
+        for rect in self.ship_rects:
+            height = max(height, rect.bottom)
+
+        self.hud_image = pygame.Surface((self.screen_rect.width, height), pygame.SRCALPHA)
+        self.hud_image.blit(self.score_image, self.score_rect)
+        self.hud_image.blit(self.high_score_image, self.high_score_rect)
+        self.hud_image.blit(self.level_image, self.level_rect)
+        for rect in self.ship_rects:
+            self.hud_image.blit(self.ship_image, rect)
+
+        # Only the parts of the HUD with something in them are drawn
+        self.hud_rects = [self.score_rect, self.high_score_rect, self.level_rect]
+        if self.ship_rects:
+            self.hud_rects.append(self.ship_rects[0].unionall(self.ship_rects))
+        self.__hud_dirty = False
+
     def show_score(self):
-        """Draw scores, level, and ships to the screen."""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
-        self.ships.draw(self.screen)
+        """Draw scores, level, and ships to the screen, and return the rects drawn."""
+        if self.__hud_dirty:
+            self.prep_hud()
+
+        # The HUD sits at the top left of the screen, so its areas are screen coordinates
+        return self.screen.blits([(self.hud_image, rect, rect) for rect in self.hud_rects])
+
+    def show_main_menu(self, surface=None):
+        """Draw the menu titles and point values, to the screen unless told otherwise."""
+        if surface is None:
+            surface = self.screen
 
-    def show_main_menu(self):
         # "Space"
-        font = pygame.font.SysFont(None, 150)
+        font = TextCache.getinstance().getfont(150)
         title = font.render("SPACE", True, (51, 255, 51), (0, 0, 0))
         # Center the title at the top of the screen.
         title_rect = title.get_rect()
         title_rect.centerx = self.screen_rect.centerx
         title_rect.top = 100
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         # "Invaders"
         title2 = font.render("Invaders", True, (255, 255, 255), (0, 0, 0))
         # Center the title at the top of the screen.
         title2_rect = title2.get_rect()
         title2_rect.centerx = self.screen_rect.centerx
         title2_rect.top = title_rect.bottom
-        self.screen.blit(title2, title2_rect)
+        surface.blit(title2, title2_rect)
         # Aliens and Points
         alien_data = [
             ['images/alien3frame1.png', ' = 10 PTS'],
@@ -112,12 +174,12 @@ class Scoreboard:
         ]
 
         height = title2_rect.bottom + 75
-        font = pygame.font.SysFont(None, 65)
+        font = TextCache.getinstance().getfont(65)
 
         for data in alien_data:
             text = font.render(data[1], True, (255, 255, 255), (0, 0, 0))
             # Center the title at the top of the screen.
-            image = pygame.image.load(data[0])
+            image = AssetManager.getinstance().getimage(data[0])
             image_rect = image.get_rect()
             text_rect = text.get_rect()
             total_x = image_rect.width + text_rect.width
@@ -127,7 +189,7 @@ class Scoreboard:
             image_rect.x = self.screen_rect.centerx - (offset_x * 2)
             image_rect.top = height
             height += 90
-            self.screen.blit(image, image_rect)
-            self.screen.blit(text, text_rect)
+            surface.blit(image, image_rect)
+            surface.blit(text, text_rect)
 
         return height
@@ -0,0 +1,248 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+import numpy
+
+
+class ScoreStore:
+    """
+    A class to keep every finished game's score, in memory.
+
+    Scores are held in descending order, so the top K scores are a slice and the
+      rank of a score is a binary search. Each new score is inserted into the lists,
+      which is fine for the scores of one session (it is used for headless games).
+      Subclasses add persistence by overriding _save(), which is called for each new score.
+    """
+
+    def __init__(self):
+        # Negated scores in ascending order, and the (player, score) entries in the same order
+        self.__keys = []
+        self.__entries = []
+        # player -> list of (score, level, time) in the order played
+        self.__history = {}
+
+    def add(self, player, score, level=1, played=None):
+        """Record a finished game."""
+        played = time.time() if played is None else played
+        self._remember(player, score, level, played)
+        self._save(player, score, level, played)
+
+    def _remember(self, player, score, level, played):
+        # Equal scores keep the order they were played in
+        index = bisect_right(self.__keys, -score)
+        self.__keys.insert(index, -score)
+        self.__entries.insert(index, (player, score))
+        self.__history.setdefault(player, []).append((score, level, played))
+
+    def _save(self, player, score, level, played):
+        pass
+
+    def top(self, count):
+        """Return the best 'count' (player, score) entries, best first."""
+        return self.__entries[:count]
+
+    def rank(self, score):
+        """Return the position (from 1) a score would take among all recorded scores."""
+        return bisect_left(self.__keys, -score) + 1
+
+    def count(self):
+        return len(self.__keys)
+
+    def history(self, player):
+        """Return a player's (score, level, time) for every game they finished, oldest first."""
+        return list(self.__history.get(player, []))
+
+    def close(self):
+        pass
+
+
+class ScoreCounts:
+    """
+    A class to count the games ending on each score, so the number of better scores
+      is found in logarithmic time.
+
+    The distinct scores known when it is built index a Fenwick tree. A score first seen
+      later goes into a short sorted list instead, and the list is merged into a new
+      tree once it holds more than 'merge_after' games.
+    """
+
+    merge_after = 4096
+
+    def __init__(self, scores=(), games=()):
+        """Build from matching sequences of distinct scores and the games ending on each."""
+        self.__build(numpy.asarray(scores, numpy.int64), numpy.asarray(games, numpy.int64))
+
+    def __build(self, scores, games):
+        order = numpy.argsort(scores)
+        self.__scores = scores[order]
+        self.__games = games[order]
+        # Node i (from 1) holds the games on the distinct scores i - lowbit(i) to i - 1
+        sums = numpy.concatenate(([0], numpy.cumsum(self.__games)))
+        index = numpy.arange(1, len(scores) + 1)
+        self.__tree = sums[index] - sums[index - (index & -index)]
+        self.__treetotal = int(sums[-1])
+        # Scores not in the tree, one entry per game, in ascending order
+        self.__extra = []
+
+    def add(self, score):
+        """Count one more game ending on 'score'."""
+        scores = self.__scores
+        position = int(numpy.searchsorted(scores, score))
+        if position == len(scores) or scores[position] != score:
+            insort(self.__extra, score)
+            if len(self.__extra) > self.merge_after:
+                extra, games = numpy.unique(numpy.asarray(self.__extra, numpy.int64), return_counts=True)
+                self.__build(numpy.concatenate((scores, extra)), numpy.concatenate((self.__games, games)))
+            return
+
+        self.__games[position] += 1
+        tree = self.__tree
+        index = position + 1
+        while index <= len(tree):
+            tree[index - 1] += 1
+            index += index & -index
+        self.__treetotal += 1
+
+    def greater(self, score):
+        """Return the number of games that ended on a score above 'score'."""
+        tree = self.__tree
+        index = int(numpy.searchsorted(self.__scores, score, 'right'))
+        atmost = 0
+        while index > 0:
+            atmost += int(tree[index - 1])
+            index -= index & -index
+        return self.__treetotal - atmost + len(self.__extra) - bisect_right(self.__extra, score)
+
+
+class SQLiteScoreStore(ScoreStore):
+    """
+    A score store kept in an SQLite database.
+
+    Nothing is loaded at start-up: the top K and a player's history are read from the
+      database through its indexes by score and by player. Ranks come from a ScoreCounts
+      tree, built from the score index the first time one is asked for and kept up to
+      date as scores are added. New scores are written by a background thread, so
+      the game never waits for a commit; each is committed in its own transaction to a
+      write-ahead log, so a crash can lose at most the scores still queued, never
+      corrupt the table. Queries include the scores still queued, so a score counts as
+      soon as it is added.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        """Open (or create) the database at 'path', importing the text file at 'legacy_path' the first time."""
+        super().__init__()
+        self.path = path
+
+        connection = sqlite3.connect(path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS scores (id INTEGER PRIMARY KEY, player TEXT NOT NULL, "
+                               "score INTEGER NOT NULL, level INTEGER NOT NULL, played REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)")
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC)")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+            imported = connection.execute("SELECT value FROM meta WHERE key = 'legacy_imported'").fetchone()
+            if imported is None:
+                if legacy_path is not None and os.path.isfile(legacy_path):
+                    self.__importlegacy(connection, legacy_path)
+                connection.execute("INSERT INTO meta VALUES ('legacy_imported', ?)", (str(legacy_path),))
+
+        connection.close()
+
+        # Read by the game's thread; the writer has a connection of its own
+        self.__connection = sqlite3.connect(path)
+        # Scores queued but not yet committed, oldest first. The writer takes one off only once it is
+        #   committed, holding the lock throughout, so a query sees every score exactly once
+        self.__pending = []
+        # Games per score, once a rank has been asked for
+        self.__counts = None
+        self.__lock = threading.Lock()
+        self.__queue = queue.Queue()
+        self.__thread = threading.Thread(target=self.__write, name='SQLiteScoreStore', daemon=True)
+        self.__thread.start()
+
+    @staticmethod
+    def __importlegacy(connection, path):
+        """Copy the scores of the old 'NAME SCORE' per line text file, skipping its '---' placeholders."""
+        played = os.path.getmtime(path)
+        with open(path) as file:
+            for line in file:
+                player, _, score = line.strip().rpartition(' ')
+                if not player or not score.isdigit() or (player == '---' and int(score) == 0):
+                    continue
+                connection.execute("INSERT INTO scores (player, score, level, played) VALUES (?, ?, 1, ?)",
+                                   (player, int(score), played))
+
+    def _remember(self, player, score, level, played):
+        with self.__lock:
+            self.__pending.append((player, score, level, played))
+            if self.__counts is not None:
+                self.__counts.add(score)
+
+    def _save(self, player, score, level, played):
+        self.__queue.put((player, score, level, played))
+
+    def top(self, count):
+        """Return the best 'count' (player, score) entries, best first."""
+        with self.__lock:
+            entries = self.__connection.execute(
+                "SELECT player, score FROM scores ORDER BY score DESC, id LIMIT ?", (count,)).fetchall()
+            if not self.__pending:
+                return entries
+            # Queued scores were played after every stored one, so they go after equal stored scores
+            entries.extend((player, score) for player, score, level, played in self.__pending)
+        entries.sort(key=lambda entry: -entry[1])
+        return entries[:count]
+
+    def rank(self, score):
+        """Return the position (from 1) a score would take among all recorded scores."""
+        with self.__lock:
+            if self.__counts is None:
+                rows = self.__connection.execute("SELECT score, COUNT(*) FROM scores GROUP BY score").fetchall()
+                self.__counts = ScoreCounts([row[0] for row in rows], [row[1] for row in rows])
+                for entry in self.__pending:
+                    self.__counts.add(entry[1])
+            return self.__counts.greater(score) + 1
+
+    def count(self):
+        with self.__lock:
+            stored, = self.__connection.execute("SELECT COUNT(*) FROM scores").fetchone()
+            return stored + len(self.__pending)
+
+    def history(self, player):
+        """Return a player's (score, level, time) for every game they finished, oldest first."""
+        with self.__lock:
+            games = self.__connection.execute(
+                "SELECT score, level, played FROM scores WHERE player = ? ORDER BY id", (player,)).fetchall()
+            games.extend((score, level, played) for name, score, level, played in self.__pending if name == player)
+        return games
+
+    def __write(self):
+        """Writer thread: commit queued scores until the None sentinel arrives."""
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while True:
+                row = self.__queue.get()
+                if row is None:
+                    break
+                with self.__lock:
+                    with connection:
+                        connection.execute("INSERT INTO scores (player, score, level, played) VALUES (?, ?, ?, ?)",
+                                           row)
+                    self.__pending.pop(0)
+        finally:
+            connection.close()
+
+    def close(self):
+        """Write the queued scores and stop the writer."""
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join()
+        self.__thread = None
+        self.__connection.close()
@@ -1,4 +1,4 @@
-import pygame
+from assetmanager import AssetManager
 
 
 class Settings:
@@ -10,11 +10,75 @@ class Settings:
         self.screen_width = 1200
         self.screen_height = 800
         self.bg_color = (0, 0, 0)
-        self.screenbackground = pygame.image.load('images/background.png')
-        self.screenbackgroundrect = self.screenbackground.get_rect()
+        # Decoded the first time it is drawn, by which time the display exists to convert it to
+        self.screenbackground_path = 'images/background.png'
+
+        # Timing settings
+        # The simulation always advances in fixed steps of 1 / tick_rate seconds
+        self.tick_rate = 120
+        # Maximum frames drawn per second; 0 draws as often as possible
+        self.frame_cap = 60
+        # Longest real frame time fed to the simulation, so a stall doesn't cause a burst of ticks
+        self.max_frame_time = 0.25
+
+        # Display settings
+        # None plays at the display's native resolution. A (width, height) such as (1200, 800) fixes the
+        #   size the game is played and drawn at, scaled to the display once per frame, so neither the
+        #   gameplay nor the cost of a frame depend on the monitor
+        self.logical_resolution = None
+        # 'scaled' has SDL scale the frame (pygame.SCALED); 'smooth' smoothscales it in software,
+        #   keeping the scaled menus for each output size
+        self.scale_mode = 'scaled'
+
+        # Render settings
+        # 'dirty' redraws and presents only changed areas; 'full' redraws and flips every frame
+        self.render_mode = 'dirty'
+        # Fraction of the screen that may change before a dirty frame falls back to a full flip
+        self.dirty_threshold = 0.5
+
+        # Frame profiler settings (F3 toggles the profiler in game)
+        self.profile = False
+        # Frames in the rolling percentiles and graph, and frames between overlay refreshes
+        self.profile_window = 240
+        self.profile_overlay_interval = 15
+        # Frames kept for the CSV written on exit
+        self.profile_max_samples = 100000
+        self.profile_csv = 'frametimes.csv'
+
+        # Sound settings
+        # Mixer buffer in samples (512 is about 12ms at 44.1kHz); smaller is more responsive but may stutter
+        self.mixer_frequency = 44100
+        self.mixer_buffer = 512
+        # Channels kept for sound effects, and the most effects started in one frame
+        self.sfx_channels = 8
+        self.sfx_voices_per_frame = 4
+
+        # Music settings
+        # Decoded music is kept here between runs
+        self.music_cache = '.musiccache'
+        # Length of the pieces music is queued in, and of the crossfade between tempos
+        self.music_chunk_seconds = 1.0
+        self.music_crossfade_ms = 250
+
+        # Asset settings
+        # Images are served from this bundle (built by 'python assetbundle.py') when it exists
+        self.asset_bundle = 'assets.bundle'
+
+        # Frame capture settings (--capture PATH records, F12 pauses and resumes)
+        # 'png' sequence, 'raw' RGB24 stream or 'zlib' compressed stream
+        self.capture_format = 'png'
+        # Capture every Nth presented frame, scaled to capture_resolution (None keeps the screen size)
+        self.capture_every = 1
+        self.capture_resolution = None
+        # Frames waiting for the writer; when full, new frames are dropped
+        self.capture_queue_size = 120
 
         # Game settings
+        # High scores shown in the table; every score is kept in score_database
         self.maxscores = 10
+        self.score_database = 'highscores.db'
+        # The old text file of high scores, imported into the database the first time it is created
+        self.legacy_highscores = 'highscores.txt'
         self.number_of_rows = 6
 
         # Ship settings
@@ -28,13 +92,18 @@ class Settings:
         self.alien_bullet_color = (255, 175, 15)
 
         # Alien Bullet limits
+        # Most alien bullets in flight at once; a safety limit that normal play stays well below
+        self.alien_bullets_allowed = 100
         self.minimum_fire_interval = 500
         self.default_fire_interval = 2000
-        # Random selects a number between 0 and this as its range, fires if equal to following variable
+        # Each shot opportunity fires (aliens left) / (fire chance + 1) bullets on average,
+        #   from the front of randomly chosen columns. Lower is more aggressive.
         self.maximum_fire_chance = 3
-        # Fire a bullet if random number is the this number
-        self.fire_chance_key = 1
         self.default_fire_chance = 25
+        # Each level shortens the fire interval by fire_interval_step ms,
+        #   and every fire_chance_levels levels lower the fire chance by one
+        self.fire_interval_step = 30
+        self.fire_chance_levels = 4
         self.current_fire_interval = self.default_fire_interval
         self.current_fire_chance = self.default_fire_chance
 
@@ -45,35 +114,42 @@ class Settings:
         self.fleet_drop_speed = 5
         self.score_values = [40, 20, 10]
 
-        # UFO settings
-        self.ufo_speed = 2.5
+        # UFO settings (pixels per second)
+        self.ufo_speed = 300
 
         # How quickly the game speeds up
         self.speedup_scale = 1.1
         # How quickly the alien point values increase
         self.score_scale = 1.5
 
-        # Dynamic settings
-        self.ship_speed = 1.5
-        self.ship_speed = 1.5
-        self.bullet_speed = 3.0
-        self.alien_speed = 1
+        # Dynamic settings (speeds are in pixels per second)
+        self.ship_speed = 180.0
+        self.bullet_speed = 360.0
+        self.alien_speed = 120.0
         self.fleet_direction = 1
         self.alien_points = 50
         self.max_aliens = 90
 
         # Dynamic settings boundaries
-        self.maximum_ship_speed = 6.5
-        self.maximum_bullet_speed = 9
-        self.maximum_alien_speed = 4.5
+        self.maximum_ship_speed = 780
+        self.maximum_bullet_speed = 1080
+        self.maximum_alien_speed = 540
 
         self.initialize_dynamic_settings()
 
+    @property
+    def screenbackground(self):
+        return AssetManager.getinstance().getimage(self.screenbackground_path)
+
+    @property
+    def screenbackgroundrect(self):
+        return self.screenbackground.get_rect()
+
     def initialize_dynamic_settings(self):
         """Initialize settings that change throughout the game."""
-        self.ship_speed = 1.5
-        self.bullet_speed = 3.0
-        self.alien_speed = 1.0
+        self.ship_speed = 180.0
+        self.bullet_speed = 360.0
+        self.alien_speed = 120.0
 
         # fleet_direction of 1 represents right; -1 represents left.
         self.fleet_direction = 1
@@ -92,12 +168,12 @@ class Settings:
         self.alien_speed *= self.speedup_scale
 
         """Increase variables related to alien bullets"""
-        self.current_fire_interval = self.default_fire_interval - ((level - 1) * 30)
+        self.current_fire_interval = self.default_fire_interval - ((level - 1) * self.fire_interval_step)
 
         if self.current_fire_interval < self.minimum_fire_interval:
             self.current_fire_interval = self.minimum_fire_interval
 
-        self.current_fire_chance = self.default_fire_chance - int(level / 4)
+        self.current_fire_chance = self.default_fire_chance - int(level / self.fire_chance_levels)
 
         if self.current_fire_chance < self.maximum_fire_chance:
             self.current_fire_chance = self.maximum_fire_chance
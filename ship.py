@@ -1,5 +1,5 @@
-import pygame
 from pygame.sprite import Sprite
+from assetmanager import AssetManager
 
 
 class Ship(Sprite):
@@ -13,7 +13,7 @@ class Ship(Sprite):
         self.screen_rect = ai_game.screen.get_rect()
 
         # Load the ship image and get its rect.
-        self.image = pygame.image.load('images/ship.png')
+        self.image = AssetManager.getinstance().getimage('images/ship.png')
         self.explosion_frames = [
             'images/shipexplosionframe1.png',
             'images/shipexplosionframe2.png',
@@ -38,35 +38,39 @@ class Ship(Sprite):
         # Start each new ship at the bottom center of the screen.
         self.rect.midbottom = self.screen_rect.midbottom
 
-        # Store a decimal value for the ship's horizontal position.
+        # Store a decimal value for the ship's horizontal position, and where it was last tick.
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
         # Movement flags
         self.moving_right = False
         self.moving_left = False
 
-    def update(self):
+    def update(self, dt):
         """Update the ship's position based on movement flags."""
+        self.previous_x = self.x
         # Update the ship's x value, not the rect.
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.x += self.settings.ship_speed
+            self.x += self.settings.ship_speed * dt
         if self.moving_left and self.rect.left > 0:
-            self.x -= self.settings.ship_speed
+            self.x -= self.settings.ship_speed * dt
 
         # Update rect object from self.x.
         self.rect.x = self.x
 
-    def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def blitme(self, alpha=1.0):
+        """Draw the ship between its last two positions."""
+        x = self.previous_x + (self.x - self.previous_x) * alpha
+        return self.screen.blit(self.image, (x, self.rect.y))
 
     def center_ship(self):
         """Center the ship on the screen."""
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
     def setexplosionframe(self, image):
-        self.image = pygame.image.load(image)
+        self.image = AssetManager.getinstance().getimage(image)
 
     def resetimage(self):
-        self.image = pygame.image.load('images/ship.png')
+        self.image = AssetManager.getinstance().getimage('images/ship.png')
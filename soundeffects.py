@@ -0,0 +1,126 @@
+import os
+import numpy
+import pygame
+
+
+class SoundEffects:
+    """
+    A class to play short sound effects on a pool of reserved channels.
+
+    Every effect is loaded once, up front; an effect whose file is missing is
+      synthesized instead, so the game is never silent (or crashes) for want of a wav.
+      A new voice takes a free channel of the pool, or else steals the oldest voice of
+      lower or equal priority; when every channel is playing something more important
+      it is dropped. At most 'voices_per_frame' voices start each frame, so a burst of
+      explosions can't flood the mixer; newframe() must be called once per frame.
+    """
+
+    # name: (file, priority, volume); higher priority voices steal from lower ones
+    effects = {
+        'shoot': ('sounds/shoot.wav', 1, 0.15),
+        'alienshoot': ('sounds/alienshoot.wav', 0, 0.08),
+        'aliendeath': ('sounds/aliendeath.wav', 1, 0.15),
+        'shipexplosion': ('sounds/shipexplosion.wav', 3, 0.3),
+        'ufo': ('sounds/ufosound.wav', 2, 0.10),
+    }
+
+    def __init__(self, first_channel, channels, voices_per_frame):
+        """Load every effect and reserve 'channels' channels, numbered from 'first_channel'."""
+        self.channels = [pygame.mixer.Channel(index) for index in range(first_channel, first_channel + channels)]
+        self.voices_per_frame = voices_per_frame
+        self.sounds = {}
+        self.priorities = {}
+        for name, (path, priority, volume) in self.effects.items():
+            sound = pygame.mixer.Sound(path) if os.path.isfile(path) else synthesize(name)
+            sound.set_volume(volume)
+            self.sounds[name] = sound
+            self.priorities[name] = priority
+
+        # What each channel was last given: (priority, start order)
+        self.__voices = [(-1, 0)] * channels
+        self.__started = 0
+        self.__thisframe = 0
+
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def play(self, name, loops=0):
+        """Start an effect; return its Channel, or None if it was dropped."""
+        if self.__thisframe >= self.voices_per_frame:
+            self.dropped += 1
+            return None
+
+        priority = self.priorities[name]
+        index = None
+        for candidate, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                index = candidate
+                break
+        if index is None:
+            # Steal the oldest of the least important voices, if it is no more important than this one
+            index = min(range(len(self.channels)), key=lambda candidate: self.__voices[candidate])
+            if self.__voices[index][0] > priority:
+                self.dropped += 1
+                return None
+            self.stolen += 1
+
+        channel = self.channels[index]
+        channel.play(self.sounds[name], loops)
+        self.__started += 1
+        self.__voices[index] = (priority, self.__started)
+        self.__thisframe += 1
+        self.played += 1
+        return channel
+
+    def stop(self, name):
+        """Stop every voice playing an effect."""
+        sound = self.sounds[name]
+        for channel in self.channels:
+            if channel.get_sound() is sound:
+                channel.stop()
+
+    def newframe(self):
+        self.__thisframe = 0
+
+
+def synthesize(name):
+    """Return a stand-in Sound for an effect, generated in the mixer's format."""
+    frequency, size, channels = pygame.mixer.get_init()
+
+    def seconds(duration):
+        return numpy.arange(int(duration * frequency)) / frequency
+
+    # Fixed seed, so the noise is the same on every run
+    noise = numpy.random.default_rng(0)
+    if name == 'shoot':
+        # A square wave sweeping down
+        t = seconds(0.12)
+        pitch = 1200 - 6500 * t
+        wave = numpy.sign(numpy.sin(2 * numpy.pi * numpy.cumsum(pitch) / frequency)) * (1 - t / 0.12)
+    elif name == 'alienshoot':
+        t = seconds(0.1)
+        pitch = 320 - 1500 * t
+        wave = numpy.sign(numpy.sin(2 * numpy.pi * numpy.cumsum(pitch) / frequency)) * (1 - t / 0.1) * 0.7
+    elif name == 'aliendeath':
+        t = seconds(0.25)
+        wave = noise.uniform(-1, 1, len(t)) * numpy.exp(-t * 14)
+    elif name == 'shipexplosion':
+        # Noise, smoothed to a rumble
+        t = seconds(0.8)
+        rumble = numpy.convolve(noise.uniform(-1, 1, len(t)), numpy.ones(24) / 24, 'same')
+        wave = rumble / numpy.abs(rumble).max() * numpy.exp(-t * 4)
+    else:
+        # A warble that loops seamlessly: whole cycles of both the tone and its wobble
+        t = seconds(0.5)
+        pitch = 600 + 200 * numpy.sin(2 * numpy.pi * 8 * t)
+        wave = numpy.sin(2 * numpy.pi * numpy.cumsum(pitch) / frequency) * 0.6
+
+    if size == 8:
+        samples = (wave * 127 + 128).astype(numpy.uint8)
+    elif size == 32:
+        # A positive 32 is the floating point format
+        samples = wave.astype('<f4')
+    else:
+        samples = (wave * (2 ** (abs(size) - 1) - 1)).astype('<i{}'.format(abs(size) // 8))
+    return pygame.mixer.Sound(buffer=numpy.repeat(samples, channels).tobytes())
@@ -2,6 +2,9 @@ import pygame
 import threading
 import sys
 from pygame.locals import *
+from settings import Settings
+from musicplayer import MusicCache, MusicPlayer
+from soundeffects import SoundEffects
 
 
 # Singleton class SoundManager
@@ -9,51 +12,91 @@ class SoundManager:
     __instance = None
 
     @staticmethod
-    def getinstance():
-        # Static access
+    def getinstance(muted=False, settings=None):
+        # Static access; 'muted' and 'settings' only apply when the instance is first created
         if SoundManager.__instance is None:
-            SoundManager()
+            if muted:
+                # Headless runs get a manager that never touches the mixer, so no audio device is needed
+                SoundManager.__instance = NullSoundManager()
+            else:
+                SoundManager(settings)
         return SoundManager.__instance
 
-    def __init__(self):
+    def __init__(self, settings=None):
         if SoundManager.__instance is not None:
             raise Exception("Instance already exists")
         else:
             SoundManager.__instance = self
-            pygame.mixer.init(buffer=16)
-            self.__ufosound = pygame.mixer.Sound('sounds/ufosound.wav')
-            self.__ufosound.set_volume(.10)
-            self.__ufosoundactive = False
-            self.__backgroundmusicfiles = ['sounds/backgroundmusic.mp3', 'sounds/backgroundmusic110.mp3',
-                                           'sounds/backgroundmusic133.mp3', 'sounds/backgroundmusic150.mp3']
             self.backgroundmusicspeeds = [1, 1.1, 1.33, 1.5]
             self.musicindex = 0
-            pygame.mixer.music.load(self.__backgroundmusicfiles[self.musicindex])
+            self.__ufosoundactive = False
+            # The channel the UFO's hum was started on
+            self.__ufochannel = None
             self.__musicplaying = False
-            self.__basemusicduration = 130
-            self.__currentduration = 0
+
+            if settings is None:
+                settings = Settings()
+
+            # A buffer of a few milliseconds keeps effects responsive without starving the mixer.
+            #   An open mixer ignores init(), so one opened with other settings is closed first
+            #   (the game avoids this by calling pre_init() before pygame.init())
+            if pygame.mixer.get_init() is not None and pygame.mixer.get_init()[0] != settings.mixer_frequency:
+                pygame.mixer.quit()
+            pygame.mixer.init(frequency=settings.mixer_frequency, buffer=settings.mixer_buffer)
+            self.__backgroundmusicfiles = ['sounds/backgroundmusic.mp3', 'sounds/backgroundmusic110.mp3',
+                                           'sounds/backgroundmusic133.mp3', 'sounds/backgroundmusic150.mp3']
+            # Channels 0 and 1 are kept for music, the next sfx_channels for effects
+            pygame.mixer.set_num_channels(2 + settings.sfx_channels)
+            pygame.mixer.set_reserved(2 + settings.sfx_channels)
+            self.__effects = SoundEffects(2, settings.sfx_channels, settings.sfx_voices_per_frame)
+            # Every tempo is decoded (or read from the cache) in the background while the menu shows
+            channels = [pygame.mixer.Channel(0), pygame.mixer.Channel(1)]
+            self.__music = MusicPlayer(self.__backgroundmusicfiles, self.backgroundmusicspeeds,
+                                       MusicCache(settings.music_cache), channels,
+                                       settings.music_chunk_seconds, settings.music_crossfade_ms, 0.1,
+                                       background=True)
 
     def startgame(self):
-        pygame.mixer.music.play(-1, 0.0)
-        pygame.mixer.music.set_volume(0.1)
+        self.__music.play(self.musicindex)
         self.__musicplaying = True
 
     def getmusicplaying(self):
         return self.__musicplaying
 
     def stopmusic(self):
-        pygame.mixer.music.stop()
+        self.__music.stop()
         self.__musicplaying = False
 
     def newlevel(self):
-        # Implement logic to offset base music to feel less 'jumpy'?
+        # Back to the start of the song at normal speed, crossfading so it isn't 'jumpy'
         self.musicindex = 0
-        pygame.mixer.music.load(self.__backgroundmusicfiles[self.musicindex])
-        pygame.mixer.music.play(-1, 0.0)
-        pygame.mixer.music.set_volume(0.1)
-        self.__currentduration = 0
+        self.__music.play(self.musicindex, 0.0, fade=True)
+        self.__musicplaying = True
+
+    def update(self):
+        """Keep the music fed and open the next frame's voices; call once per frame."""
+        self.__music.update()
+        self.__effects.newframe()
+
+    def playsound(self, name):
+        """Play one of the SoundEffects effects, e.g. 'shoot'."""
+        self.__effects.play(name)
+
+    def getstats(self):
+        """
+        Return the effect voices played, stolen and dropped, the times the music ran out of
+          queued chunks, and how long the music took to load (None while it is loading).
+
+        The mixer's own buffer underruns aren't visible to pygame, so they aren't counted.
+        """
+        return {'played': self.__effects.played, 'stolen': self.__effects.stolen,
+                'dropped': self.__effects.dropped, 'music_starved': self.__music.starved,
+                'music_load_seconds': self.__music.load_seconds}
 
     def getufosoundactive(self):
+        # A more important effect may have stolen the hum's channel
+        if self.__ufosoundactive and self.__ufochannel.get_sound() is not self.__effects.sounds['ufo']:
+            self.__ufosoundactive = False
         return self.__ufosoundactive
 
     @staticmethod
@@ -75,25 +118,67 @@ class SoundManager:
         thread.start()
 
     def increasemusicspeed(self):
-        # Increase the current position offset by the real position of the song (duration * speed)
-        self.__currentduration += pygame.mixer.music.get_pos() * self.backgroundmusicspeeds[self.musicindex] / 1000
-
         # Set background music to the next speed
         self.musicindex += 1
         if self.musicindex > len(self.__backgroundmusicfiles) - 1:
             self.musicindex = 0
 
-        # Offset duration to be a position relevant to the next speed
-        self.__currentduration %= self.__basemusicduration / self.backgroundmusicspeeds[self.musicindex]
-        pygame.mixer.music.load(self.__backgroundmusicfiles[self.musicindex])
-        pygame.mixer.music.play(-1, 0.0)
-        pygame.mixer.music.set_pos(self.__currentduration)
-        pygame.mixer.music.set_volume(0.1)
+        # Crossfade to it at the same point in the song
+        self.__music.switch(self.musicindex)
+
+    def playufosound(self):
+        # The UFO hums until it leaves or is shot down
+        self.__ufochannel = self.__effects.play('ufo', loops=-1)
+        self.__ufosoundactive = self.__ufochannel is not None
+
+    def stopufosound(self):
+        self.__effects.stop('ufo')
+        self.__ufosoundactive = False
+
+
+class NullSoundManager:
+    """A SoundManager that plays nothing, keeping only the state callers read back."""
+
+    def __init__(self):
+        self.backgroundmusicspeeds = [1, 1.1, 1.33, 1.5]
+        self.musicindex = 0
+        self.__ufosoundactive = False
+        self.__musicplaying = False
+
+    @staticmethod
+    def getinstance():
+        return SoundManager.getinstance()
+
+    def startgame(self):
+        self.__musicplaying = True
+
+    def getmusicplaying(self):
+        return self.__musicplaying
+
+    def stopmusic(self):
+        self.__musicplaying = False
+
+    def newlevel(self):
+        self.musicindex = 0
+        self.__musicplaying = True
+
+    def update(self):
+        pass
+
+    def playsound(self, name):
+        pass
+
+    def getstats(self):
+        return {'played': 0, 'stolen': 0, 'dropped': 0, 'music_starved': 0, 'music_load_seconds': 0.0}
+
+    def getufosoundactive(self):
+        return self.__ufosoundactive
+
+    def increasemusicspeed(self):
+        self.musicindex = (self.musicindex + 1) % len(self.backgroundmusicspeeds)
 
     def playufosound(self):
-        self.__ufosound.play()
         self.__ufosoundactive = True
 
     def stopufosound(self):
-        self.__ufosound.stop()
         self.__ufosoundactive = False
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+import pygame
+import pygame.font
+
+
+# Singleton class TextCache
+class TextCache:
+    """A class to cache fonts and rendered text, with a digit atlas for numbers."""
+    __instance = None
+
+    # Characters rendered into each digit atlas
+    digits = '0123456789,-'
+
+    @staticmethod
+    def getinstance():
+        # Static access
+        if TextCache.__instance is None:
+            TextCache()
+        return TextCache.__instance
+
+    def __init__(self, maxsize=256):
+        if TextCache.__instance is not None:
+            raise Exception("Instance already exists")
+        else:
+            TextCache.__instance = self
+            # Rendered strings, least recently used first
+            self.maxsize = maxsize
+            self.__text = OrderedDict()
+            # (name, size) -> Font
+            self.__fonts = {}
+            # (name, size, color, background) -> {character: Surface}
+            self.__atlases = {}
+            self.hits = 0
+            self.misses = 0
+
+    def getfont(self, size, name=None):
+        """Return the font for a name and size, resolving it only once."""
+        font = self.__fonts.get((name, size))
+
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self.__fonts[(name, size)] = font
+
+        return font
+
+    def render(self, text, size, color, background=None, name=None):
+        """Return a shared rendered surface for a string. Callers must not modify it."""
+        key = (name, size, text, color, background)
+        image = self.__text.get(key)
+
+        if image is not None:
+            self.hits += 1
+            self.__text.move_to_end(key)
+            return image
+
+        self.misses += 1
+        image = self.getfont(size, name).render(text, True, color, background)
+        self.__text[key] = image
+
+        # Evict the least recently used strings
+        while len(self.__text) > self.maxsize:
+            self.__text.popitem(last=False)
+
+        return image
+
+    def rendernumber(self, text, size, color, background=None, name=None):
+        """
+        Return a new surface for a formatted number, assembled from cached glyphs.
+
+        Scores change too often to cache every value, so each digit is rendered once per
+          font and colour and numbers are built by blitting glyphs side by side.
+        """
+        key = (name, size, color, background)
+        atlas = self.__atlases.get(key)
+
+        if atlas is None:
+            font = self.getfont(size, name)
+            atlas = {}
+            for character in self.digits:
+                atlas[character] = font.render(character, True, color, background)
+            self.__atlases[key] = atlas
+
+        if any(character not in atlas for character in text):
+            return self.render(text, size, color, background, name)
+
+        glyphs = [atlas[character] for character in text]
+        width = sum(glyph.get_width() for glyph in glyphs)
+        height = max(glyph.get_height() for glyph in glyphs) if glyphs else self.getfont(size, name).get_height()
+
+        if background is None:
+            image = pygame.Surface((width, height), pygame.SRCALPHA)
+        else:
+            image = pygame.Surface((width, height))
+            image.fill(background)
+
+        x = 0
+        for glyph in glyphs:
+            image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+
+        return image
+
+    def stats(self):
+        return {'strings': len(self.__text), 'hits': self.hits, 'misses': self.misses}
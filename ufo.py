@@ -1,5 +1,5 @@
-import pygame
 from pygame.sprite import Sprite
+from assetmanager import AssetManager
 
 
 class UFO(Sprite):
@@ -12,15 +12,16 @@ class UFO(Sprite):
         self.settings = ai_game.settings
 
         # Load the alien image and set its rect attribute.
-        self.image = pygame.image.load('images/ufo.png')
+        self.image = AssetManager.getinstance().getimage('images/ufo.png')
         self.rect = self.image.get_rect()
 
         # Start each new UFO near the top left of the screen.
         self.rect.x = self.rect.width
         self.rect.y = self.rect.height
 
-        # Store the UFO's exact horizontal position.
+        # Store the UFO's exact horizontal position, and where it was last tick for drawing.
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
         # Store the UFO's score value
         self.score = score
@@ -31,11 +32,13 @@ class UFO(Sprite):
         if self.rect.right >= screen_rect.right or self.rect.left <= 0:
             return True
 
-    def update(self):
+    def update(self, dt):
         """Move the UFO right"""
-        self.x += self.settings.ufo_speed
+        self.previous_x = self.x
+        self.x += self.settings.ufo_speed * dt
         self.rect.x = self.x
 
-    def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def blitme(self, alpha=1.0):
+        """Draw the UFO between its last two positions."""
+        x = self.previous_x + (self.x - self.previous_x) * alpha
+        return self.screen.blit(self.image, (x, self.rect.y))